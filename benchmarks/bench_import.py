@@ -0,0 +1,85 @@
+"""
+Import time benchmark
+
+Measures the cold start of the checker entry points in fresh interpreters
+with -X importtime: importing checker for a run over HTTP only, and the
+hotfolder watcher which also loads watchdog. Reports the median total
+import time, the slowest modules and which optional stacks got loaded.
+
+    python benchmarks/bench_import.py [--repeat 5] [--top 10]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_POINTS = {
+    "cli": "import checker",
+    "watcher": "import checker\nfrom watchdog.observers import Observer",
+}
+
+# stacks that should only be imported by the sheets or modes using them
+LAZY_STACKS = ["selenium", "seleniumrequests", "pandas", "bs4", "watchdog"]
+
+
+def import_times(code, cwd):
+    """
+    run code in a fresh interpreter, return {module: cumulative microseconds}
+    and the top level modules it imported
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import sys\n{code}"],
+        cwd=cwd,
+        env=dict(os.environ, PYTHONPATH=ROOT),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, module = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    # debug.log and config.yml are looked up in the working directory
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, code in ENTRY_POINTS.items():
+            runs = [import_times(code, tmp) for _ in range(args.repeat)]
+            totals = [
+                times.get("checker", 0) + times.get("watchdog.observers", 0)
+                for times in runs
+            ]
+            last = runs[-1]
+            loaded = [stack for stack in LAZY_STACKS if stack in last]
+
+            print(
+                f"{name}: {statistics.median(totals) / 1000:.1f}ms median "
+                f"of {args.repeat}, loaded {', '.join(loaded) or 'no lazy stacks'}"
+            )
+            slowest = sorted(
+                (item for item in last.items() if "." not in item[0]),
+                key=lambda item: item[1],
+                reverse=True,
+            )[: args.top]
+            for module, cumulative in slowest:
+                print(f"  {module:<24} {cumulative / 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
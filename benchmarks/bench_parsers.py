@@ -0,0 +1,174 @@
+"""
+Registry page parser comparison
+
+Runs every parser backend over the registry pages in benchmarks/fixtures,
+checks each output against the expected output stored in
+benchmarks/fixtures/expected and reports the time per page of each backend.
+Also checks which names the surveyor register snapshot answers locally.
+
+The pages are synthetic. They copy the markup the parsers read from the
+live registries, padded with inline script filler to a realistic page
+size, so the timings are indicative only. --update rewrites the expected
+outputs from the bs4 backend after a deliberate parser change.
+
+    python benchmarks/bench_parsers.py [--repeat 200] [--update]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import checker  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+EXPECTED = os.path.join(FIXTURES, "expected")
+
+# (page, expected output file, parser)
+PAGES = [
+    (
+        "qbcc_licence.html",
+        "qbcc_licence.json",
+        lambda html: list(checker.parse_qbcc_response(html)),
+    ),
+    (
+        "qbcc_not_found.html",
+        "qbcc_not_found.json",
+        lambda html: list(checker.parse_qbcc_response(html)),
+    ),
+    ("surveyor_results.html", "surveyor_results.json", checker.parse_surveyor_response),
+    (
+        "surveyor_no_results.html",
+        "surveyor_no_results.json",
+        checker.parse_surveyor_response,
+    ),
+    (
+        "surveyor_results.html",
+        "surveyor_results_entries.json",
+        checker.parse_surveyor_entries,
+    ),
+    ("bpeq_party.html", "bpeq_party.json", checker.parse_engr_party),
+    ("boaq_party_company.html", "boaq_party_company.json", checker.parse_arch_party),
+    ("boaq_party.html", "boaq_party.json", checker.parse_arch_party),
+]
+
+# (search text, surveyor the register snapshot of surveyor_results.html
+# answers with, None when it has to be searched live)
+REGISTER_CASES = [
+    ("John Andrew Smith", "John Andrew Smith"),
+    ("Mr Smith, John Andrew", "John Andrew Smith"),
+    ("John Smith", "John Andrew Smith"),
+    ("Smith & Co Surveys", "Jane Smith"),
+    # close to a registered surveyor, but maybe someone else
+    ("Joan Smith", None),
+    ("J Smith", None),
+    ("Jon Andrew Smith", None),
+    ("Smith", None),
+]
+
+
+def use_backend(name):
+    checker.html_parser = checker.HTML_PARSERS[name]()
+
+
+def as_json(result):
+    # tuples and lists both come back from json as lists
+    return json.loads(json.dumps(result))
+
+
+def read_expected(filename):
+    with open(os.path.join(EXPECTED, filename), encoding="utf-8") as fp:
+        return json.load(fp)
+
+
+def write_expected(filename, result):
+    os.makedirs(EXPECTED, exist_ok=True)
+    with open(os.path.join(EXPECTED, filename), "w", encoding="utf-8") as fp:
+        json.dump(result, fp, indent=2)
+        fp.write("\n")
+
+
+def check_register():
+    """
+    number of REGISTER_CASES the surveyor register gets wrong
+    """
+    with open(os.path.join(FIXTURES, "surveyor_results.html"), encoding="utf-8") as fp:
+        register = checker.SurveyorRegister(checker.parse_surveyor_entries(fp.read()))
+
+    mismatches = 0
+    for search_text, expected in REGISTER_CASES:
+        result = register.lookup(search_text)
+        name = result["name"] if result else None
+        if name != expected:
+            mismatches = mismatches + 1
+            print(f"MISMATCH register lookup {search_text!r}: {name!r} != {expected!r}")
+    return mismatches
+
+
+def timed(parse, html, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        parse(html)
+    return (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument(
+        "--update",
+        action="store_true",
+        help="rewrite the expected outputs from the bs4 backend",
+    )
+    args = parser.parse_args()
+    checker.logger.setLevel(logging.WARNING)
+
+    backends = list(checker.HTML_PARSERS)
+    mismatches = 0
+    totals = dict.fromkeys(backends, 0.0)
+
+    for filename, expected_file, parse in PAGES:
+        with open(os.path.join(FIXTURES, filename), encoding="utf-8") as fp:
+            html = fp.read()
+
+        if args.update:
+            use_backend("bs4")
+            write_expected(expected_file, as_json(parse(html)))
+        expected = read_expected(expected_file)
+
+        timings = []
+        for name in backends:
+            use_backend(name)
+            result = as_json(parse(html))
+            if result != expected:
+                mismatches = mismatches + 1
+                print(
+                    f"MISMATCH {filename} [{name}]: {result!r} != "
+                    f"{expected_file} {expected!r}"
+                )
+            elapsed = timed(parse, html, args.repeat)
+            totals[name] = totals[name] + elapsed
+            timings.append(f"{name} {elapsed * 1000:.2f}ms")
+
+        print(f"{filename:>26}: " + ", ".join(timings))
+
+    mismatches = mismatches + check_register()
+
+    baseline = totals["bs4"]
+    print(
+        "total per page set: "
+        + ", ".join(
+            f"{name} {total * 1000:.2f}ms ({baseline / total:.1f}x)"
+            for name, total in totals.items()
+        )
+    )
+    if mismatches:
+        sys.exit(f"{mismatches} outputs differ from the expected outputs")
+
+
+if __name__ == "__main__":
+    main()
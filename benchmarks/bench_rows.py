@@ -0,0 +1,93 @@
+"""
+Row extraction micro-benchmark
+
+Compares enum_rows with the column-projected iter_sheet_rows on a
+synthetic sheet laid out like the QBCC individual tab, both on a workbook
+loaded for editing and on a read-only one.
+
+    python benchmarks/bench_rows.py [--rows 50000] [--columns 20]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import openpyxl
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import checker  # noqa: E402
+
+SHEET_CONFIG = {"license_index": 2, "status_index": 4, "last_checked_index": 7}
+
+
+def make_workbook(path, rows, columns):
+    """
+    write a synthetic QBCC individual sheet
+    """
+    # a regular workbook stores shared strings like Excel does, write_only
+    # ones use inline strings which are much slower to read back
+    wb = openpyxl.Workbook()
+    sheet = wb.active
+    sheet.title = "1. QBCC - individual"
+    header = [f"column {c}" for c in range(columns)]
+    header[2] = "licence number"
+    sheet.append(header)
+
+    checked = datetime.now() - timedelta(days=30)
+    for r in range(rows):
+        row = [f"value {r}-{c}" for c in range(columns)]
+        row[2] = 1000000 + r
+        row[4] = "Active"
+        row[7] = checked
+        sheet.append(row)
+
+    wb.save(path)
+
+
+def consume_enum_rows(sheet):
+    for row, _ in checker.enum_rows(sheet):
+        row[SHEET_CONFIG["license_index"]].value
+
+
+def consume_projected_rows(sheet):
+    for row, _ in checker.iter_sheet_rows(sheet, SHEET_CONFIG):
+        row[SHEET_CONFIG["license_index"]].value
+
+
+def timed(func, path, read_only):
+    wb = openpyxl.load_workbook(path, read_only=read_only)
+    try:
+        started = time.perf_counter()
+        func(wb["1. QBCC - individual"])
+        return time.perf_counter() - started
+    finally:
+        wb.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--columns", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.xlsx")
+        make_workbook(path, args.rows, args.columns)
+
+        print(f"{args.rows} rows x {args.columns} columns")
+        for read_only in (False, True):
+            mode = "read-only" if read_only else "edit"
+            baseline = timed(consume_enum_rows, path, read_only)
+            projected = timed(consume_projected_rows, path, read_only)
+            print(
+                f"{mode:>10}: enum_rows {baseline:.2f}s, "
+                f"iter_sheet_rows {projected:.2f}s ({baseline / projected:.1f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+End-to-end workbook benchmark
+
+Generates workbooks of 1k, 10k and 100k rows laid out like the sample
+sheets_config of config.yml.bak and runs process_workbook on each of them
+against the local stand-in registries, without touching the live
+registers. Every size runs in its own process so peak RSS is per size.
+Reports rows/s, peak RSS and the time spent saving, from the run summary
+process_workbook writes next to the workbook.
+
+    python benchmarks/bench_workbook.py [--sizes 1000 10000] [--latency 0.05]
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+import openpyxl
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from standin_registries import StandinRegistries  # noqa: E402
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# sheets with a stand-in registry, as (title, columns, licence column)
+SHEETS = [
+    ("1. QBCC - individual", 8, 2),
+    ("2. QBCC company license", 8, 0),
+    ("3. QBCC - certifier", 10, 2),
+    ("4.QBCC - Pool Safety Inspectors", 8, 2),
+    ("9. Surveyor", 7, None),
+]
+
+SURNAMES = ["Smith", "Jones", "Brown", "Wilson", "Taylor", "Nguyen", "Walker"]
+FIRST_NAMES = ["John", "Sarah", "Michael", "Emma", "David", "Olivia", "James"]
+
+
+def make_workbook(path, rows, duplicates=0.3, recent=0.1, seed=1):
+    """
+    write a synthetic workbook of rows spread over the sheets
+
+    duplicates is the share of rows repeating a licence number or name of
+    another row, recent the share checked a day ago and skipped by the run.
+    """
+    rng = random.Random(seed)
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    per_sheet = rows // len(SHEETS)
+    unique = max(1, int(per_sheet * (1 - duplicates)))
+    stale = datetime.now() - timedelta(days=30)
+    fresh = datetime.now() - timedelta(days=1)
+
+    for title, columns, license_index in SHEETS:
+        sheet = wb.create_sheet(title)
+        header = [f"column {c}" for c in range(columns)]
+        if license_index is not None:
+            header[license_index] = "Licence Number"
+        sheet.append(header)
+
+        last_checked_index = columns - 1
+        for r in range(per_sheet):
+            key = rng.randrange(unique)
+            row = [None] * columns
+            if license_index is None:
+                row[0] = f"{SURNAMES[key % len(SURNAMES)]}{key}"
+                row[1] = FIRST_NAMES[key % len(FIRST_NAMES)]
+                row[2] = f"Survey Co {key}"
+            elif title.startswith("4."):
+                row[license_index] = f"PS{15000 + key}"
+            else:
+                row[license_index] = 1000000 + key
+            row[last_checked_index] = fresh if rng.random() < recent else stale
+            sheet.append(row)
+
+    wb.save(path)
+
+
+def bench_config(engine):
+    """
+    the sample configuration with the network extras turned off
+    """
+    with open(os.path.join(ROOT, "config.yml.bak"), "rt", encoding="utf-8") as fp:
+        config = yaml.safe_load(fp)
+
+    config["sheets_config"] = {
+        title: config["sheets_config"][title] for title, _, _ in SHEETS
+    }
+    config.update(
+        engine=engine,
+        with_browser=False,
+        rate_limits={},
+        default_rate_limit=0,
+        lookup_cache=dict(config["lookup_cache"], enabled=False),
+        pool_safety_bulk=dict(config["pool_safety_bulk"], enabled=False),
+        http=dict(config["http"], backoff=0.1, max_backoff=1),
+    )
+    return config
+
+
+def run(workdir, base_url):
+    """
+    process the workbook of workdir, in the benchmark subprocess
+    """
+    os.chdir(workdir)
+    import checker
+    from standin_registries import point_checker_at
+
+    point_checker_at(base_url)
+    checker.process_workbook(os.path.join(workdir, "bench.xlsx"), None)
+
+    with open("bench.xlsx.stats.json", "rt", encoding="utf-8") as fp:
+        summary = json.load(fp)
+    summary["peak_rss_mb"] = peak_rss_mb()
+    print(json.dumps(summary))
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--missing-rate", type=float, default=0.1)
+    parser.add_argument("--engine", choices=["sync", "async"], default="sync")
+    parser.add_argument("--run", nargs=2, metavar=("WORKDIR", "BASE_URL"))
+    args = parser.parse_args()
+
+    if args.run:
+        run(*args.run)
+        return
+
+    server = StandinRegistries(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        missing_rate=args.missing_rate,
+    ).start()
+    print(
+        f"engine {args.engine}, latency {args.latency}s, "
+        f"error rate {args.error_rate:.0%}, stand-ins on {server.base_url}"
+    )
+
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            make_workbook(os.path.join(tmp, "bench.xlsx"), size)
+            with open(os.path.join(tmp, "config.yml"), "wt", encoding="utf-8") as fp:
+                yaml.safe_dump(bench_config(args.engine), fp)
+
+            requests_before = server.requests
+            result = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--run", tmp,
+                 server.base_url],
+                capture_output=True,
+                text=True,
+            )
+            if result.returncode != 0:
+                print(f"{size:>7} rows: failed\n{result.stderr[-2000:]}")
+                continue
+
+            summary = json.loads(result.stdout.strip().splitlines()[-1])
+            print(
+                f"{size:>7} rows: {summary['rows']} checked in "
+                f"{summary['elapsed_seconds']:.1f}s "
+                f"({summary['rows_per_second'] or 0:.1f} rows/s), "
+                f"peak RSS {summary['peak_rss_mb']} MB, "
+                f"save {summary['save']['seconds']:.2f}s, "
+                f"{server.requests - requests_before} requests"
+            )
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
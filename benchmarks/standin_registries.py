@@ -0,0 +1,234 @@
+"""
+Local stand-in registry servers
+
+Serves the synthetic registry pages in benchmarks/fixtures in place of the
+QBCC licence search, the SBQ surveyor search and the pool safety Aura
+endpoint, with a configurable latency, error rate and share of licences
+that are not found. point_checker_at() sends checker's lookups to it.
+
+    python benchmarks/standin_registries.py [--port 8080] [--latency 0.05]
+"""
+
+import argparse
+import copy
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.parse
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import checker  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# checker constants pointing at the live registries
+REGISTRY_URLS = [
+    "QBCC_CONTRACTOR_SEARCH_URL",
+    "QBCC_CERTIFIER_SEARCH_URL",
+    "QBCC_DETAIL_URL",
+    "SURVEYOR_SEARCH_URL",
+    "POOL_SAFETY_SEARCH_URL",
+    "POOL_SAFETY_AURA_URL",
+]
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as fp:
+        return fp.read()
+
+
+def path_of(url):
+    return urllib.parse.urlsplit(url).path
+
+
+class StandinRegistries(ThreadingHTTPServer):
+    """
+    HTTP server answering like the registries checker queries.
+
+    latency is the mean delay of a response in seconds, error_rate the
+    share of requests answered with a 503 and missing_rate the share of
+    licence numbers or names that are not in the register. Whether a key is
+    missing only depends on the key, so repeated runs agree.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, port=0, latency=0.0, error_rate=0.0, missing_rate=0.1):
+        super().__init__(("127.0.0.1", port), StandinHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.missing_rate = missing_rate
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self.pages = {
+            "qbcc_licence": fixture("qbcc_licence.html"),
+            "qbcc_not_found": fixture("qbcc_not_found.html"),
+            "surveyor_results": fixture("surveyor_results.html"),
+            "surveyor_no_results": fixture("surveyor_no_results.html"),
+            "aura_inspector": json.loads(fixture("aura_inspector.json")),
+        }
+        self.routes = {
+            path_of(checker.QBCC_CONTRACTOR_SEARCH_URL): "qbcc_search",
+            path_of(checker.QBCC_CERTIFIER_SEARCH_URL): "qbcc_search",
+            path_of(checker.QBCC_DETAIL_URL): "qbcc_detail",
+            path_of(checker.SURVEYOR_SEARCH_URL): "surveyor",
+            path_of(checker.POOL_SAFETY_SEARCH_URL): "pool_safety_search",
+            path_of(checker.POOL_SAFETY_AURA_URL): "aura",
+        }
+
+    def handle_error(self, request, client_address):
+        # clients going away mid-response, e.g. fallback searches still
+        # running when a benchmark run ends
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def is_missing(self, key):
+        return zlib.crc32(f"{key}".encode("utf-8")) % 1000 < self.missing_rate * 1000
+
+    def start(self):
+        """
+        serve on a background thread
+        """
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body go out in two writes, without this every keep-alive
+    # response waits for the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, content_type="text/html", headers=None):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _delay_or_fail(self):
+        server = self.server
+        with server._lock:
+            server.requests = server.requests + 1
+        if server.latency:
+            time.sleep(random.uniform(0.5, 1.5) * server.latency)
+        if server.error_rate and random.random() < server.error_rate:
+            with server._lock:
+                server.errors = server.errors + 1
+            self._send(503, "Service Unavailable", headers={"Retry-After": "1"})
+            return True
+        return False
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        query = urllib.parse.parse_qs(url.query)
+        route = self.server.routes.get(url.path)
+        if route is None:
+            self._send(404, "Not Found")
+            return
+        if self._delay_or_fail():
+            return
+
+        pages = self.server.pages
+        if route == "qbcc_search":
+            self._send(200, pages["qbcc_not_found"])
+        elif route == "qbcc_detail":
+            license_no = query.get("LicNO", [""])[0]
+            missing = self.server.is_missing(license_no)
+            self._send(200, pages["qbcc_not_found" if missing else "qbcc_licence"])
+        elif route == "surveyor":
+            title = query.get("title", [None])[0]
+            found = title is not None and not self.server.is_missing(title)
+            page = "surveyor_results" if found else "surveyor_no_results"
+            self._send(200, pages[page])
+        elif route == "pool_safety_search":
+            render_ctx = urllib.parse.quote(json.dumps({"pageId": "standin"}))
+            self._send(
+                200,
+                "<html><body>pool safety inspector search</body></html>",
+                headers={
+                    "Set-Cookie": f"renderCtx={render_ctx}; Path=/",
+                    "x-sfdc-request-id": "standin",
+                },
+            )
+        else:
+            self._send(405, "Method Not Allowed")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        form = urllib.parse.parse_qs(self.rfile.read(length).decode("utf-8"))
+        if self.server.routes.get(urllib.parse.urlsplit(self.path).path) != "aura":
+            self._send(404, "Not Found")
+            return
+        if self._delay_or_fail():
+            return
+
+        params = json.loads(form["message"][0])["actions"][0]["params"]
+        license_no = params.get("licenceNumber", "")
+        payload = copy.deepcopy(self.server.pages["aura_inspector"])
+        if self.server.is_missing(license_no):
+            payload["actions"][0]["returnValue"] = []
+        else:
+            payload["actions"][0]["returnValue"][0]["licenceNumber"] = license_no
+        self._send(200, json.dumps(payload), content_type="application/json")
+
+
+def point_checker_at(base_url):
+    """
+    send checker's QBCC, surveyor and pool safety lookups to base_url
+    """
+    for name in REGISTRY_URLS:
+        url = urllib.parse.urlsplit(getattr(checker, name))
+        query = f"?{url.query}" if url.query else ""
+        setattr(checker, name, base_url + url.path + query)
+
+    checker.qbcc_contractor_session = checker.RegistrySession(
+        checker.QBCC_CONTRACTOR_SEARCH_URL
+    )
+    checker.qbcc_certifier_session = checker.RegistrySession(
+        checker.QBCC_CERTIFIER_SEARCH_URL
+    )
+    checker.surveyor_session = checker.RegistrySession(
+        checker.SURVEYOR_SEARCH_URL,
+        http=checker.pooled_session(checker.SURVEYOR_HEADERS),
+    )
+    checker.pool_safety_client = checker.AuraClient()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--missing-rate", type=float, default=0.1)
+    args = parser.parse_args()
+
+    server = StandinRegistries(
+        args.port, args.latency, args.error_rate, args.missing_rate
+    )
+    print(f"Stand-in registries on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
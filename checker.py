@@ -3,27 +3,46 @@ Competent Person checker
 """
 
 import argparse
+import asyncio
+import contextvars
+import difflib
+import hashlib
 import time
 import json
 import logging
+import multiprocessing
 import re
 import os
+import queue
+import random
+import sqlite3
+import threading
+import types
 import urllib.parse
-from functools import partial
-from datetime import datetime
+from collections import namedtuple
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing.managers import SyncManager
+from functools import partial, wraps
+from datetime import date, datetime
+from typing import TYPE_CHECKING
 import shutil
-from bs4 import BeautifulSoup
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver import ChromeOptions
+import signal
+import sys
 import openpyxl
 import requests
-import numpy as np
-from seleniumrequests import Chrome
 import yaml
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
+
+# selenium, pandas, bs4 and watchdog are imported where they are used, a
+# run that only needs HTTP lookups never loads them
+if TYPE_CHECKING:
+    from seleniumrequests import Chrome
+
+try:
+    import lxml.etree
+    import lxml.html
+except ImportError:
+    lxml = None
 
 try:
     # from yaml import CLoader as Loader, CDumper as Dumper
@@ -39,7 +58,8 @@ logger.setLevel(logging.DEBUG)  # Set the overall logging level
 
 # Create handlers
 console_handler = logging.StreamHandler()  # Handler for console output
-file_handler = logging.FileHandler("debug.log")  # Handler for file output
+# Handler for file output, debug.log is only created by the first record
+file_handler = logging.FileHandler("debug.log", delay=True)
 
 # Set logging levels for handlers
 console_handler.setLevel(logging.INFO)  # Only INFO and above for console
@@ -68,839 +88,3926 @@ session.headers.update(
 )
 
 
-def enum_rows(sheet):
-    """Enumerate Rows
+def pooled_session(headers, pool_size=10):
+    """
+    requests session with its own connection pool and default headers, so
+    registries do not share cookies, headers or connections
+    """
+    http = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=2, pool_maxsize=pool_size
+    )
+    http.mount("https://", adapter)
+    http.mount("http://", adapter)
+    http.headers.update(headers)
+    return http
 
-    Args:
-        sheet (_type_): _description_
 
-    Yields:
-        _type_: _description_
+# registry and phase the timings recorded by the current thread or task
+# belong to, set by cached_lookup / lookup_once and run_stats.phase
+current_registry = contextvars.ContextVar("current_registry", default=None)
+current_phase = contextvars.ContextVar("current_phase", default="request")
+
+
+def percentile(values, q):
+    """
+    q-th percentile of values, interpolated like numpy's default
     """
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
 
-    headers = list()
 
-    for r in sheet.rows:
-        values = [f"{c.value}".strip() for c in r]
+class RunStats:
+    """
+    Timings of the hot paths of a process_workbook run.
 
-        if not headers:
-            headers = [v.lower() for v in values]
-            continue
+    Durations are kept per registry and phase: throttle (waiting for the
+    rate limiter), warm_up and request (one HTTP attempt), parse, lookup
+    (one row key, cache included), browser_start, and the write and save
+    phases of the workbook. The summary reports p50/p95/p99 of every phase,
+    rows per second, cache hit rates and the share of the run spent saving.
+    """
 
-        item = dict()
-        for h, c in zip(headers, r):
-            item[h] = f"{c.value}".strip() if c else ""
+    WORKBOOK = "workbook"
 
-        yield r, item
+    def __init__(self):
+        self.reset()
+
+    def reset(self, filepath=None):
+        """
+        start the statistics of a new run
+        """
+        self.filepath = filepath
+        self.started_at = datetime.now()
+        self.started = time.monotonic()
+        self.timings = {}
+        self.counters = {}
+        self.rows = {}
+        self._lock = threading.Lock()
+
+    def record(self, phase, seconds, registry=None):
+        """
+        add the duration of one phase, for the current registry by default
+        """
+        registry = registry or current_registry.get() or self.WORKBOOK
+        with self._lock:
+            self.timings.setdefault((registry, phase), []).append(seconds)
 
+    def count(self, name, registry=None):
+        """
+        increment a counter of the current registry
+        """
+        key = (registry or current_registry.get() or self.WORKBOOK, name)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + 1
 
-def parse_qbcc_response(html):
-    soup = BeautifulSoup(html, "html.parser")
+    def count_row(self, sheet_title):
+        """
+        count a row written to a sheet
+        """
+        with self._lock:
+            self.rows[sheet_title] = self.rows.get(sheet_title, 0) + 1
 
-    business_name_element = soup.select_one(
-        "#ctl00_generalContentPlaceHolder_LicenceInfoControl1_lbLicenceName"
-    )
-    trading_name_element = soup.select_one(
-        "ctl00_generalContentPlaceHolder_LicenceInfoControl1_lbTradingName"
-    )
+    @contextmanager
+    def timed(self, phase, registry=None):
+        """
+        record the duration of the with block
+        """
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(phase, time.monotonic() - started, registry)
+
+    @contextmanager
+    def phase(self, phase):
+        """
+        file the requests sent in the with block under another phase
+        """
+        token = current_phase.set(phase)
+        try:
+            yield
+        finally:
+            current_phase.reset(token)
+
+    @contextmanager
+    def registry(self, registry):
+        """
+        file the timings of the with block under a registry
+        """
+        token = current_registry.set(registry)
+        try:
+            yield
+        finally:
+            current_registry.reset(token)
+
+    def summary(self):
+        """
+        run summary as a JSON serialisable dict
+        """
+        elapsed = time.monotonic() - self.started
+        with self._lock:
+            timings = {key: list(values) for key, values in self.timings.items()}
+            counters = dict(self.counters)
+            rows = dict(self.rows)
+
+        registries = {}
+        for (registry, phase), values in sorted(timings.items()):
+            registries.setdefault(registry, {})[phase] = {
+                "count": len(values),
+                "total": round(sum(values), 3),
+                "p50": round(percentile(values, 50), 4),
+                "p95": round(percentile(values, 95), 4),
+                "p99": round(percentile(values, 99), 4),
+                "max": round(max(values), 4),
+            }
+
+        cache = {}
+        for (registry, name), value in sorted(counters.items()):
+            if name in ("cache_hit", "cache_miss", "reused"):
+                cache.setdefault(
+                    registry, {"cache_hit": 0, "cache_miss": 0, "reused": 0}
+                )[name] = value
+        for value in cache.values():
+            looked_up = value["cache_hit"] + value["cache_miss"]
+            value["hit_rate"] = (
+                round(value["cache_hit"] / looked_up, 3) if looked_up else None
+            )
+
+        saves = timings.get((self.WORKBOOK, "save"), [])
+        total_rows = sum(rows.values())
+        return {
+            "workbook": os.path.basename(self.filepath or ""),
+            "started": self.started_at.isoformat(timespec="seconds"),
+            "elapsed_seconds": round(elapsed, 3),
+            "rows": total_rows,
+            "rows_per_second": round(total_rows / elapsed, 3) if elapsed else None,
+            "sheets": rows,
+            "save": {
+                "count": len(saves),
+                "seconds": round(sum(saves), 3),
+                "share": round(sum(saves) / elapsed, 3) if elapsed else None,
+            },
+            "cache": cache,
+            "counters": {
+                f"{registry}.{name}": value
+                for (registry, name), value in sorted(counters.items())
+                if name not in ("cache_hit", "cache_miss", "reused")
+            },
+            "registries": registries,
+        }
+
+    def write(self, path):
+        """
+        write the run summary to a JSON file and log the headline numbers
+        """
+        summary = self.summary()
+        with open(path, "wt", encoding="utf-8") as fp:
+            json.dump(summary, fp, indent=2)
 
-    items = [
-        td.text.strip("\r\n\t ")
-        for td in soup.select(
-            "table[id='ctl00_generalContentPlaceHolder_LicenceInfoControl1_gvLicenceClass'] td"
+        logger.info(
+            "Run summary: %d rows in %.1fs (%.2f rows/s), %.1fs saving.",
+            summary["rows"],
+            summary["elapsed_seconds"],
+            summary["rows_per_second"] or 0,
+            summary["save"]["seconds"],
         )
-    ]
+        for registry, phases in summary["registries"].items():
+            for phase, stats in phases.items():
+                logger.info(
+                    "\t%s %s: %d x p50 %.3fs p95 %.3fs p99 %.3fs",
+                    registry,
+                    phase,
+                    stats["count"],
+                    stats["p50"],
+                    stats["p95"],
+                    stats["p99"],
+                )
+        return summary
 
-    items_array = np.array(items)
 
-    if len(items_array) > 0 and (len(items_array) % 4) == 0:
-        for part in np.split(items_array, len(items_array) / 4):
-            yield [p.strip() for p in part]
+run_stats = RunStats()
 
 
-def parse_surveyor_response(html_content):
+class TransientLookupError(Exception):
     """
-    parse surveyor response
+    A registry could not be reached or kept failing. Unlike an empty result
+    it says nothing about the licence, so the row is left untouched and
+    stays due for the next run, and nothing is cached.
     """
-    # Parse the HTML using BeautifulSoup
-    soup = BeautifulSoup(html_content, "html.parser")
-    element = soup.select_one(".search-results")
-    if not element:
-        return
 
-    # Extract name
-    name = element.find("h4").get_text(strip=False).split("<br>")[0]
-    lic_class = element.find("h4").get_text(strip=False).split("<br>")[-1]
-    # Extract phone number
-    phone_element = element.find("td", string="Phone ")
-    phone = ""
-    if phone_element:
-        phone = phone_element.find_next_sibling("td").get_text()
-
-    # Extract email
-    email_element = element.find("td", string="Email ")
-    email = ""
-    if email_element:
-        email = email_element.find_next_sibling("td").get_text()
-
-    # Extract address
-    address_element = element.find("td", string="Address")
-    address = ""
-    if address_element:
-        address = address_element.find_next_sibling("td").get_text(separator=", ")
-
-    types = []
-    # Extract types
-    types = [
-        span.get_text()
-        for span in element.find_all("div", class_="types")[0].find_all("span")
-    ]
 
-    return {
-        "name": re.sub(r"\s+", " ", name),
-        "license_class": re.sub(r"\s+", " ", lic_class),
-        "phone": phone,
-        "email": email,
-        "address": address,
-        "expertise": "; ".join(types),
-    }
+class RateLimiter:
+    """
+    Adaptive token bucket per host.
 
+    Rates are read from the ``rate_limits`` mapping (host -> requests per
+    second) in config.yml, hosts not listed use ``default_rate_limit``.
+    A missing or zero rate means unlimited. Up to ``burst`` requests can go
+    out at once after an idle period.
 
-def query_surveyor_license(search_text):
-    """
-    query surveyor license
+    The configured rate is a ceiling: the rate of a host is halved on
+    failed requests, 429 and 5xx responses and lowered on responses slower
+    than ``slow_seconds``, down to ``min_rate``. Every other response
+    raises it again by ``step`` times the configured rate.
     """
-    search_text = re.sub(r"\s+", " ", f"{search_text}".strip())
-    logger.info("Looking up surveyor info: %s", search_text)
-    url = "https://sbq.com.au/find-a-surveyor/search-cadastral/"
-    session.get(url)
 
-    params = {
-        "surveyor-type": "individual",
-        "search-type": "name",
-        "title": search_text,
-        "postcode": "",
-        "radius": "5",
-        "q": "Search",
-    }
+    def __init__(self, rates=None, default_rate=None):
+        self.rates = dict(rates or {})
+        self.default_rate = default_rate
+        self.burst = 1
+        self.min_rate = 0.2
+        self.step = 0.1
+        self.slow_seconds = 10
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def configure(self, config):
+        """
+        load rate limits from config
+        """
+        self.rates = dict(config.get("rate_limits") or {})
+        self.default_rate = config.get("default_rate_limit")
+        adaptive = config.get("adaptive_rate") or {}
+        self.burst = adaptive.get("burst", 1)
+        self.min_rate = adaptive.get("min_rate", 0.2)
+        self.step = adaptive.get("step", 0.1)
+        self.slow_seconds = adaptive.get("slow_seconds", 10)
+
+    def share(self, buckets, lock):
+        """
+        Keep the token buckets in a mapping and lock shared with other
+        processes (multiprocessing.Manager proxies), so the rates cap the
+        requests of all of them together.
+        """
+        self._buckets = buckets
+        self._lock = lock
 
-    response = session.get(url, params=params)
-    if response.status_code != 200:
-        return
+    def _bucket(self, host, limit, now):
+        # (tokens, time of the last refill, current rate), refilled up to now
+        tokens, stamp, rate = self._buckets.get(host, (self.burst, now, limit))
+        rate = min(rate, limit)
+        return min(self.burst, tokens + (now - stamp) * rate), rate
 
-    return parse_surveyor_response(response.text)
+    def reserve(self, host):
+        """
+        Take a token for host and return the seconds the caller has to wait
+        before sending the request.
+        """
+        limit = self.rates.get(host, self.default_rate)
+        if not limit:
+            return 0
 
+        with self._lock:
+            now = time.monotonic()
+            tokens, rate = self._bucket(host, limit, now)
+            tokens = tokens - 1
+            self._buckets[host] = (tokens, now, rate)
 
-def query_qbcc_license(license_no):
-    """
-    query qbcc license
-    """
+        return max(0, -tokens / rate)
 
-    session.get(
-        "https://www.onlineservices.qbcc.qld.gov.au/OnlineLicenceSearch/VisualElements/SearchBSALicenseeContent.aspx"
-    )
+    def wait(self, url):
+        """
+        block until a request to url is allowed
+        """
+        delay = self.reserve(urllib.parse.urlsplit(url).hostname)
+        if delay > 0:
+            run_stats.record("throttle", delay)
+            time.sleep(delay)
 
-    license_no = f"{license_no}".strip("\r\n\t ")
-    url = "http://www.onlineservices.qbcc.qld.gov.au/OnlineLicenceSearch/VisualElements/ShowDetailResultContent.aspx"
-    params = {
-        "LicNO": f"{license_no}",
-        "licCat": "LIC",
-        "name": "",
-        "firstName": "",
-        "searchType": "Contractor",
-        "FromPage": "SearchContr",
-    }
-    response = requests.get(url, params=params)
-    for r in parse_qbcc_response(response.text):
-        yield r
+    def feedback(self, host, status=None, elapsed=None, retry_after=None):
+        """
+        Adapt the rate of host to a response, status None for a request
+        that failed without one. retry_after holds back the next requests.
+        """
+        limit = self.rates.get(host, self.default_rate)
+        if not limit:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            tokens, rate = self._bucket(host, limit, now)
+            if status is None or status == 429 or status >= 500:
+                rate = max(self.min_rate, rate / 2)
+            elif elapsed is not None and elapsed > self.slow_seconds:
+                rate = max(self.min_rate, rate * 0.8)
+            else:
+                rate = min(limit, rate + limit * self.step)
+            if retry_after:
+                tokens = min(tokens, -retry_after * rate)
+            self._buckets[host] = (tokens, now, rate)
 
 
-def query_qbcc_certifier_license(license_no):
+rate_limiter = RateLimiter()
+
+
+class RequestPolicy:
     """
-    query_qbcc_certifier_license
+    Timeouts and retries of the registry requests, read from the ``http``
+    section of config.yml.
     """
-    session.get(
-        "https://www.onlineservices.qbcc.qld.gov.au/OnlineLicenceSearch/VisualElements/SearchBuildingCertifierContent.aspx"
-    )
 
-    license_no = f"{license_no}".strip("\r\n\t ")
-    url = "https://www.onlineservices.qbcc.qld.gov.au/OnlineLicenceSearch/VisualElements/ShowDetailResultContent.aspx"
-    params = {
-        "LicNO": f"{license_no}",
-        "licCat": "LIC",
-        "name": "",
-        "firstName": "",
-        "searchType": "Certifier",
-        "FromPage": "SearchContr",
-    }
+    RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+    def __init__(self):
+        self.connect_timeout = 10
+        self.read_timeout = 30
+        self.retries = 3
+        self.backoff = 1.0
+        self.max_backoff = 30
+
+    def configure(self, config):
+        """
+        load timeouts and retries from config
+        """
+        http_config = config.get("http") or {}
+        self.connect_timeout = http_config.get("connect_timeout", 10)
+        self.read_timeout = http_config.get("read_timeout", 30)
+        self.retries = http_config.get("retries", 3)
+        self.backoff = http_config.get("backoff", 1.0)
+        self.max_backoff = http_config.get("max_backoff", 30)
+
+    @property
+    def timeout(self):
+        """
+        (connect, read) timeout of a request
+        """
+        return (self.connect_timeout, self.read_timeout)
+
+    def delay(self, attempt, retry_after=None, backoff=None):
+        """
+        Seconds to wait before retrying, exponential backoff with full
+        jitter and at least the Retry-After of the response.
+        """
+        ceiling = min(self.max_backoff, (backoff or self.backoff) * 2**attempt)
+        return max(random.uniform(0, ceiling), retry_after or 0)
 
-    response = session.get(url, params=params)
-    for r in parse_qbcc_response(response.text):
-        yield r
 
+request_policy = RequestPolicy()
 
-def query_engr_registration(license_number, driver: Chrome):
+
+def retry_after_seconds(headers):
     """
-    query_engr_registration
+    Retry-After header of a response in seconds, None when absent or a date
     """
     try:
-        url1 = "https://portal.bpeq.qld.gov.au/BPEQPortal/RPEQ_Directory.aspx"
-        driver.get(url1)
-        element = WebDriverWait(driver, 16).until(
-            EC.presence_of_element_located(
-                (
-                    By.ID,
-                    "ctl01_TemplateBody_WebPartManager1_gwpciEngineersearch_ciEngineersearch_ResultsGrid_Sheet0_Input3_TextBox1",
-                )
-            )
-        )
-        element.send_keys(license_number)
-        element = WebDriverWait(driver, 16).until(
-            EC.presence_of_element_located(
-                (
-                    By.ID,
-                    "ctl01_TemplateBody_WebPartManager1_gwpciEngineersearch_ciEngineersearch_ResultsGrid_Sheet0_SubmitButton",
-                )
-            )
-        )
-        element.click()
-        element = WebDriverWait(driver, 16).until(
-            EC.presence_of_element_located(
-                (
-                    By.XPATH,
-                    '//*[@id="ctl01_TemplateBody_WebPartManager1_gwpciEngineersearch_ciEngineersearch_ResultsGrid_Grid1_ctl00__0"]/td[1]/a',
-                )
-            )
-        )
-        registration_no = element.get_attribute("href").split("=")[1]
-
-        url = f"https://portal.bpeq.qld.gov.au/Party.aspx?ID={registration_no}"
-        response = driver.request("GET", url, verify=False)
-        soup = BeautifulSoup(response.text, "html.parser")
-        parts = [
-            p.text.strip("\r\n\t ") for p in soup.select(".PanelFieldValue > span")
-        ]
-        logger.info("Num Parts: %d", len(parts))
-
-        name = soup.title.text.strip("\r\n\t")
-        date_registered_from = parts[0]
-        status = parts[3]
-        date_registered_to = parts[4]
-        company = parts[5]
-        job_type = parts[1]
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
 
-        return {
-            "name": name,
-            "company": company,
-            "date_registered_from": date_registered_from,
-            "job_type": job_type,
-            "status": status,
-            "date_registered_to": date_registered_to,
-        }
 
-    except Exception as e:
-        logger.info(e)
+def http_request(method, url, http=None, **kwargs):
+    """
+    Send a request through the per-host rate limiter.
 
+    ``http`` is anything with a requests-like ``request`` method and
+    defaults to the module level session. Requests get the connect and read
+    timeouts of request_policy. Connection errors, timeouts, 429 and 5xx
+    responses are retried and raise TransientLookupError when the retries
+    are used up.
+    """
+    host = urllib.parse.urlsplit(url).hostname
+    kwargs.setdefault("timeout", request_policy.timeout)
 
-def query_arch_registration(license_number, driver: Chrome):
-    try:
-        url1 = "https://www.boaq.qld.gov.au/Web/Consumers/Search_the_Register/Web/Architect_Search.aspx?hkey=f493b110-1ad9-4ec8-a830-f9a1f70e16b5"
-        driver.get(url1)
-        element = WebDriverWait(driver, 16).until(
-            EC.presence_of_element_located(
-                (
-                    By.ID,
-                    "ctl01_TemplateBody_WebPartManager1_gwpciArchitectsearch_ciArchitectsearch_ResultsGrid_Sheet0_Input3_TextBox1",
-                )
-            )
-        )
-        element.send_keys(license_number)
-        element = WebDriverWait(driver, 16).until(
-            EC.presence_of_element_located(
-                (
-                    By.NAME,
-                    "ctl01$TemplateBody$WebPartManager1$gwpciArchitectsearch$ciArchitectsearch$ResultsGrid$Sheet0$SubmitButton",
-                )
+    for attempt in range(request_policy.retries + 1):
+        rate_limiter.wait(url)
+        started = time.monotonic()
+        retry_after = None
+        try:
+            response = (http or session).request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            run_stats.record(current_phase.get(), time.monotonic() - started)
+            rate_limiter.feedback(host)
+            error = e
+        else:
+            elapsed = time.monotonic() - started
+            run_stats.record(current_phase.get(), elapsed)
+            retry_after = retry_after_seconds(response.headers)
+            rate_limiter.feedback(
+                host,
+                response.status_code,
+                elapsed,
+                retry_after if response.status_code == 429 else None,
             )
-        )
-        element.click()
-        element = WebDriverWait(driver, 16).until(
-            EC.presence_of_element_located(
-                (
-                    By.XPATH,
-                    '//*[@id="ctl01_TemplateBody_WebPartManager1_gwpciArchitectsearch_ciArchitectsearch_ResultsGrid_Grid1_ctl00__0"]/td[1]/a',
-                )
+            if response.status_code not in request_policy.RETRY_STATUS_CODES:
+                return response
+            error = f"HTTP {response.status_code}"
+
+        if attempt < request_policy.retries:
+            run_stats.count("retries")
+            wait = request_policy.delay(attempt, retry_after)
+            logger.info(
+                "%s %s failed (%s), retrying in %.1fs.", method, url, error, wait
             )
-        )
-        registration_no = element.get_attribute("href").split("=")[1]
-        url = f"https://www.boaq.qld.gov.au/Party.aspx?ID={registration_no}"
-        response = driver.request("GET", url)
-        soup = BeautifulSoup(response.text, "html.parser")
-        parts = [
-            p.text.strip("\r\n\t ") for p in soup.select(".PanelFieldValue > span")
-        ]
-        logger.info("Num Parts: %d", len(parts))
-        if len(parts) == 12:
-            name = parts[0]
-            company = parts[1]
-            job_type = parts[2]
-            date_joined = parts[4]
-            status = parts[3]
-            date_registered = parts[4]
-
-            return name, company, date_joined, job_type, status, date_registered
-        elif len(parts) == 11:
-            name = parts[0]
-            date_joined = parts[3]
-            job_type = parts[1]
-            status = parts[2]
-            date_registered = parts[3]
-
-            return name, None, date_joined, job_type, status, date_registered
+            time.sleep(wait)
 
-    except Exception as e:
-        logger.info(e)
+    raise TransientLookupError(f"{method} {url} failed: {error}")
 
 
-def process_sheet_arch(wb, sheetname, args, config, sheet_config, orig_filename):
+def skip_transient_row(row, error):
     """
-    process_sheet_arch
+    log a row left unchecked because of a TransientLookupError
     """
-    if "architects" not in sheetname.lower():
-        return
+    run_stats.count("transient_rows", RunStats.WORKBOOK)
+    logger.warning(
+        "Row %s of %s not checked, %s. It stays due for the next run.",
+        row.number,
+        row.sheet.title,
+        error,
+    )
 
-    logger.info("Processing Architects Tab...")
-    sheet = wb[sheetname]
 
-    config = read_config()
-    count = 0
+CACHE_MISS = object()
 
-    driver = init_web_driver()
 
-    for idx, (row, data) in enumerate(enum_rows(sheet)):
-        if should_skip_row(row, sheet_config, config):
-            continue
+class LookupCache:
+    """
+    Persistent SQLite cache of parsed registry lookup results, keyed by
+    registry and licence number (or search text).
 
-        if count > 0 and (count % config["numrec_before_save"]) == 0:
-            logger.info(
-                "===============================================\n \
-                Saving progress to excel file...\n=================================="
+    Configured from the lookup_cache section of config.yml; every registry
+    can have its own TTL in ttl_days, others use default_ttl_days.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.path = "lookup_cache.sqlite3"
+        self.ttl_days = {}
+        self.default_ttl_days = 1
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def configure(self, config):
+        """
+        load cache settings from config
+        """
+        cache_config = config.get("lookup_cache") or {}
+        self.close()
+        self.enabled = cache_config.get("enabled", False)
+        self.path = cache_config.get("path", self.path)
+        self.ttl_days = dict(cache_config.get("ttl_days") or {})
+        self.default_ttl_days = cache_config.get("default_ttl_days", 1)
+
+    @staticmethod
+    def normalize_key(key):
+        """
+        cache key of a licence number or search text
+        """
+        return re.sub(r"\s+", " ", f"{key}").strip().lower()
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS lookups ("
+                "registry TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                "fetched_at REAL NOT NULL, PRIMARY KEY (registry, key))"
             )
-            wb.save(orig_filename)
+            self._conn.commit()
+        return self._conn
 
-        registration_no = str(row[sheet_config["license_index"]].value or "")
+    def get(self, registry, key):
+        """
+        return the cached result or CACHE_MISS when absent or expired
+        """
+        if not self.enabled:
+            return CACHE_MISS
+
+        ttl = self.ttl_days.get(registry, self.default_ttl_days) * 86400
+        with self._lock:
+            found = (
+                self._connection()
+                .execute(
+                    "SELECT value, fetched_at FROM lookups WHERE registry = ? AND key = ?",
+                    (registry, self.normalize_key(key)),
+                )
+                .fetchone()
+            )
 
-        logger.info("Fetching Registration info of %s:", registration_no)
-        reg_status = query_arch_registration(registration_no, driver)
+        if not found or time.time() - found[1] > ttl:
+            return CACHE_MISS
 
-        if reg_status:
-            logger.info("Registration info found!")
+        return json.loads(found[0])
 
-            name, company, date_joined, job_type, status, date_registered = reg_status
+    def put(self, registry, key, value):
+        """
+        store a lookup result
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO lookups VALUES (?, ?, ?, ?)",
+                (registry, self.normalize_key(key), json.dumps(value), time.time()),
+            )
+            conn.commit()
 
-            # lic_class, _, _, lic_status = lic_statuses[0]
-            logger.info("\tName: %s", name)
-            logger.info("\tCompany: %s", company)
-            logger.info("\tDate Joined: %s", date_joined)
-            logger.info("\tType: %s", job_type)
-            logger.info("\tStatus: %s", status)
-            logger.info("\tDate Registered: %s", date_registered)
+    def invalidate(self, registry=None, key=None):
+        """
+        Drop cached entries of a registry, of a single key or everything.
+        Returns the number of removed entries.
+        """
+        query = "DELETE FROM lookups"
+        clauses, params = [], []
+        if registry:
+            clauses.append("registry = ?")
+            params.append(registry)
+        if key is not None:
+            clauses.append("key = ?")
+            params.append(self.normalize_key(key))
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+
+        with self._lock:
+            conn = self._connection()
+            removed = conn.execute(query, params).rowcount
+            conn.commit()
+
+        return removed
+
+    def close(self):
+        """
+        close the database connection
+        """
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
 
-            row[sheet_config["status_index"]].value = status.strip().title()
-            row[sheet_config["last_checked_index"]].value = datetime.now().date()
-        else:
-            logger.info("Registration info not found in online register !")
-            row[sheet_config["status_index"]].value = "Missing in Register"
-            row[sheet_config["last_checked_index"]].value = datetime.now().date()
 
-        count = count + 1
+lookup_cache = LookupCache()
 
 
-def init_web_driver():
+class LookupPlanner:
+    """
+    Per-run lookup planner.
+
+    Before the sheets are processed, every (registry, key) pair of the
+    configured sheets is collected and each distinct key is fetched once.
+    Results, including not found ones, are kept in memory for the rest of
+    the run so duplicate rows and the same licence on several tabs are
+    answered without another request. The prefilter of each sheet is kept
+    too, so the collect pass and the processors scan a sheet once.
+    """
+
+    def __init__(self):
+        self.results = {}
+        self.row_filters = {}
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """
+        forget the results of the previous run
+        """
+        with self._lock:
+            self.results = {}
+            self.row_filters = {}
+
+    def row_filter(self, sheet, sheet_config, config):
+        """
+        prefilter_rows of a sheet, computed on the first call of the run
+        """
+        with self._lock:
+            row_filter = self.row_filters.get(sheet.title)
+        if row_filter is None:
+            row_filter = prefilter_rows(sheet, sheet_config, config)
+            with self._lock:
+                self.row_filters[sheet.title] = row_filter
+        return row_filter
+
+    def get(self, registry, key):
+        """
+        result of a lookup made during this run or CACHE_MISS
+        """
+        with self._lock:
+            return self.results.get(
+                (registry, LookupCache.normalize_key(key)), CACHE_MISS
+            )
+
+    def put(self, registry, key, value):
+        """
+        remember a lookup result for the rest of the run
+        """
+        with self._lock:
+            self.results[(registry, LookupCache.normalize_key(key))] = value
+
+    def collect(self, wb, config):
+        """
+        Return the distinct (registry, key) pairs of all due rows of the
+        configured sheets, in first seen order.
+        """
+        planned = {}
+        for sheetname, sheet_config in configured_sheets(wb, config):
+            kind = sheet_kind(sheetname)
+            registry = SHEET_REGISTRIES.get(kind)
+            if registry not in PLANNED_REGISTRIES:
+                continue
+            if registry == "pool_safety" and (config.get("pool_safety_bulk") or {}).get(
+                "enabled", False
+            ):
+                continue
+            if registry == "surveyor" and (config.get("surveyor_snapshot") or {}).get(
+                "enabled", False
+            ):
+                continue
+            if registry in ("architects", "engineers") and config.get(
+                "with_browser", False
+            ):
+                continue
+
+            for _, _, keys in sheet_lookup_jobs(
+                kind, wb[sheetname], config, sheet_config
+            ):
+                # fallback keys are only needed when the first one misses,
+                # they are looked up (and remembered) by the processors
+                if keys:
+                    normalized = (registry, LookupCache.normalize_key(keys[0]))
+                    planned.setdefault(normalized, (registry, keys[0]))
+
+        return list(planned.values())
+
+    def execute(self, wb, config):
+        """
+        fetch every distinct planned key once
+        """
+        planned = [
+            (registry, key)
+            for registry, key in self.collect(wb, config)
+            if self.get(registry, key) is CACHE_MISS
+        ]
+        logger.info("Planned %d distinct lookups.", len(planned))
+
+        def lookup(item):
+            registry, key = item
+            # the query functions store their result in the planner, keys
+            # that failed are looked up again by the sheet processors
+            try:
+                PLANNED_REGISTRIES[registry](key)
+            except TransientLookupError as e:
+                logger.info("Prefetch of %s %s failed: %s", registry, key, e)
+
+        workers = config.get("lookup_workers", 1)
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            list(executor.map(lookup, planned))
+
+
+lookup_planner = LookupPlanner()
+
+
+def cached_lookup(registry):
+    """
+    Decorator serving a query function from the lookup cache. Only positive
+    results are stored so a failed or empty lookup is retried next time.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(key, *args, **kwargs):
+            value = lookup_planner.get(registry, key)
+            if value is not CACHE_MISS:
+                run_stats.count("reused", registry)
+                return value
+
+            with run_stats.registry(registry), run_stats.timed("lookup"):
+                value = lookup_cache.get(registry, key)
+                if value is not CACHE_MISS:
+                    logger.debug("Cache hit %s: %s", registry, key)
+                    run_stats.count("cache_hit")
+                    lookup_planner.put(registry, key, value)
+                    return value
+
+                run_stats.count("cache_miss")
+                value = func(key, *args, **kwargs)
+                if isinstance(value, types.GeneratorType):
+                    value = list(value)
+            if value:
+                lookup_cache.put(registry, key, value)
+            lookup_planner.put(registry, key, value)
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def enum_rows(sheet):
+    """Enumerate Rows
+
+    Args:
+        sheet (_type_): _description_
+
+    Yields:
+        _type_: _description_
+    """
+
+    headers = list()
+
+    for r in sheet.rows:
+        values = [f"{c.value}".strip() for c in r]
+
+        if not headers:
+            headers = [v.lower() for v in values]
+            continue
+
+        item = dict()
+        for h, c in zip(headers, r):
+            item[h] = f"{c.value}".strip() if c else ""
+
+        yield r, item
+
+
+class CellWriter:
+    """
+    Single writer of the workbook cells.
+
+    openpyxl workbooks are not thread safe, a date written to a cell also
+    updates the style tables shared by every sheet. While sheets run in
+    parallel, cells written by the sheet threads are queued and written by
+    the thread running the sheets.
+    """
+
+    def __init__(self):
+        self._queue = None
+        self._owner = None
+
+    def write(self, sheet, row, column, value):
+        """
+        write a cell now, or queue it when called from a sheet thread
+        """
+        if self._queue is not None and threading.get_ident() != self._owner:
+            self._queue.put((sheet, row, column, value))
+            return
+        sheet.cell(row=row, column=column).value = value
+
+    @contextmanager
+    def deferred(self):
+        """
+        queue the writes of other threads until the with block ends, the
+        caller writes them with apply
+        """
+        self._queue = queue.Queue()
+        self._owner = threading.get_ident()
+        try:
+            yield
+        finally:
+            self.apply()
+            self._queue = None
+            self._owner = None
+
+    def apply(self, timeout=None):
+        """
+        write the queued cells, waiting up to timeout for the first one
+        """
+        try:
+            item = self._queue.get(timeout=timeout) if timeout else None
+            while True:
+                if item is not None:
+                    sheet, row, column, value = item
+                    sheet.cell(row=row, column=column).value = value
+                item = self._queue.get_nowait()
+        except queue.Empty:
+            pass
+
+
+cell_writer = CellWriter()
+
+
+class ProjectedCell:
+    """
+    Cell of a ProjectedRow. Assigned values are written through to the
+    worksheet by the cell_writer unless it is read-only.
+    """
+
+    __slots__ = ("row", "index")
+
+    def __init__(self, row, index):
+        self.row = row
+        self.index = index
+
+    @property
+    def value(self):
+        return self.row.values.get(self.index)
+
+    @value.setter
+    def value(self, value):
+        self.row.values[self.index] = value
+        if not self.row.sheet.parent.read_only:
+            cell_writer.write(self.row.sheet, self.row.number, self.index + 1, value)
+
+
+class ProjectedRow:
+    """
+    Row holding only the columns named in sheet_config, indexed like a row
+    of cells so processors can keep using row[index].value.
+    """
+
+    __slots__ = ("sheet", "number", "values")
+
+    def __init__(self, sheet, number, values):
+        self.sheet = sheet
+        self.number = number
+        self.values = values
+
+    def __getitem__(self, index):
+        return ProjectedCell(self, index)
+
+
+def sheet_config_columns(sheet_config):
+    """
+    0-based column indexes named in a sheet_config entry
+    """
+    return sorted(
+        {
+            value
+            for key, value in sheet_config.items()
+            if key.endswith("_index") and isinstance(value, int)
+        }
+    )
+
+
+def find_header_columns(sheet, headers):
+    """
+    0-based columns of the given lower-case header names in the first row
+    """
+    header_columns = {}
+    header_row = next(sheet.iter_rows(max_row=1, values_only=True), ())
+    wanted = set(headers)
+    for col, value in enumerate(header_row):
+        name = f"{value}".strip().lower()
+        if name in wanted and name not in header_columns:
+            header_columns[name] = col
+
+    return header_columns
+
+
+RowFilter = namedtuple("RowFilter", "due blank total")
+
+
+def prefilter_rows(sheet, sheet_config, config):
+    """
+    Work out which rows of a sheet are due for a check in one vectorised
+    pass over the last checked and key columns, instead of calling
+    should_skip_row on every row.
+
+    Returns a RowFilter with the set of due row numbers, the number of rows
+    without a key and the number of data rows. Rows of the pool safety tab
+    with a blank licence number are always due since they get flagged.
+    """
+    import pandas as pd
+
+    last_index = sheet_config["last_checked_index"]
+    key_indexes = [
+        sheet_config[key]
+        for key in (
+            "license_index",
+            "first_name_index",
+            "surname_index",
+            "company_index",
+        )
+        if key in sheet_config
+    ]
+    kind = sheet_kind(sheet.title)
+    if kind == "pool_safety":
+        header_columns = find_header_columns(sheet, ["licence number"])
+        key_indexes = list(header_columns.values()) or key_indexes
+
+    columns = sorted(set(key_indexes) | {last_index})
+    first, last = columns[0], columns[-1]
+    frame = pd.DataFrame(
+        sheet.iter_rows(
+            min_row=2, min_col=first + 1, max_col=last + 1, values_only=True
+        )
+    )
+    if frame.empty:
+        return RowFilter(set(), 0, 0)
+
+    frame = frame.reindex(columns=[col - first for col in columns])
+    frame.columns = columns
+    frame.index = frame.index + 2
+
+    # statuses journaled by a crashed two_pass run are not in the sheet yet
+    if sheet.parent.read_only:
+        # a column of datetimes comes back as datetime64, which rejects the
+        # plain dates in the journal
+        frame[last_index] = frame[last_index].astype(object)
+        for (title, number, col), value in progress_journal.pending.items():
+            if title == sheet.title and col == last_index and number in frame.index:
+                frame.at[number, last_index] = value
+
+    checked = frame[last_index]
+    # same rule as should_skip_row, only real dates count as checked
+    is_date = checked.map(lambda value: isinstance(value, date))
+    checked_on = pd.to_datetime(checked.where(is_date), errors="coerce")
+    age = (pd.Timestamp(date.today()) - checked_on.dt.normalize()).dt.days
+    fresh = age <= config.get("skip_days", 5)
+
+    if key_indexes:
+        keys = frame[key_indexes]
+        empty = keys.astype(str).apply(lambda column: column.str.strip().eq(""))
+        blank = (keys.isna() | empty).all(axis=1)
+    else:
+        blank = pd.Series(False, index=frame.index)
+
+    due = ~fresh | blank if kind == "pool_safety" else ~fresh
+    row_filter = RowFilter(set(frame.index[due]), int(blank.sum()), len(frame))
+    logger.info(
+        "Prefilter %s: %d of %d rows due, %d without a key.",
+        sheet.title,
+        len(row_filter.due),
+        row_filter.total,
+        row_filter.blank,
+    )
+    return row_filter
+
+
+def iter_sheet_rows(sheet, sheet_config, headers=None, config=None):
+    """
+    Yield (row, data) for every data row of a sheet, like enum_rows, but
+    only the columns named in sheet_config are read, with values_only.
+
+    ``headers`` lists the header names the caller needs in ``data``, their
+    columns are added to the projection. ``data`` holds only those names,
+    a name missing from the header row is missing from ``data``.
+
+    When ``prefilter`` is enabled in config, rows that are not due for a
+    check are left out, and with ``max_rows`` only that many data rows are
+    read.
+    """
+    columns = set(sheet_config_columns(sheet_config))
+
+    header_columns = {}
+    if headers:
+        header_columns = find_header_columns(sheet, headers)
+        columns.update(header_columns.values())
+
+    due = None
+    if config and config.get("prefilter", False):
+        due = lookup_planner.row_filter(sheet, sheet_config, config).due
+
+    if not columns:
+        return
+
+    first, last = min(columns), max(columns)
+    columns = sorted(columns)
+    pending = progress_journal.pending if sheet.parent.read_only else {}
+    title = sheet.title
+    max_rows = config.get("max_rows") if config else None
+
+    for number, values in enumerate(
+        sheet.iter_rows(
+            min_row=2,
+            max_row=max_rows + 1 if max_rows else None,
+            min_col=first + 1,
+            max_col=last + 1,
+            values_only=True,
+        ),
+        start=2,
+    ):
+        if due is not None and number not in due:
+            continue
+
+        projected = {}
+        for col in columns:
+            offset = col - first
+            projected[col] = values[offset] if offset < len(values) else None
+        if pending:
+            for col in columns:
+                if (title, number, col) in pending:
+                    projected[col] = pending[(title, number, col)]
+
+        data = {
+            name: f"{projected[col]}".strip() for name, col in header_columns.items()
+        }
+        yield ProjectedRow(sheet, number, projected), data
+
+
+QBCC_LICENCE_CLASS_TABLE = "ctl00_generalContentPlaceHolder_LicenceInfoControl1_gvLicenceClass"
+
+
+def make_soup(html):
+    """
+    parse a page with bs4's html.parser, bs4 is imported on first use
+    """
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(html, "html.parser")
+
+
+class SoupParser:
+    """
+    BeautifulSoup (html.parser) backend of the registry page parsers
+    """
+
+    name = "bs4"
+
+    def qbcc_cells(self, html):
+        """
+        text of the cells of the licence class table
+        """
+        soup = make_soup(html)
+        return [
+            td.text.strip("\r\n\t ")
+            for td in soup.select(f"table[id='{QBCC_LICENCE_CLASS_TABLE}'] td")
+        ]
+
+    def surveyor_fields(self, html):
+        """
+        raw fields of the first .search-results block, None when absent
+        """
+        soup = make_soup(html)
+        element = soup.select_one(".search-results")
+        if element:
+            return self._surveyor_block(element)
+
+    def surveyor_entries(self, html):
+        """
+        raw fields of every .search-results block
+        """
+        soup = make_soup(html)
+        return [self._surveyor_block(e) for e in soup.select(".search-results")]
+
+    @staticmethod
+    def _surveyor_block(element):
+        def next_cell(label, separator=""):
+            label_element = element.find("td", string=label)
+            if not label_element:
+                return ""
+            return label_element.find_next_sibling("td").get_text(separator=separator)
+
+        return {
+            # name and licence class are separate text nodes around a <br>
+            "heading": element.find("h4").get_text(separator="<br>"),
+            "phone": next_cell("Phone "),
+            "email": next_cell("Email "),
+            "address": next_cell("Address", separator=", "),
+            "company": next_cell("Company "),
+            "types": [
+                span.get_text()
+                for span in element.find_all("div", class_="types")[0].find_all("span")
+            ],
+        }
+
+    def party_fields(self, html):
+        """
+        page title and .PanelFieldValue spans of an iMIS Party.aspx page
+        """
+        soup = make_soup(html)
+        parts = [
+            p.text.strip("\r\n\t ") for p in soup.select(".PanelFieldValue > span")
+        ]
+        return (soup.title.text if soup.title else None), parts
+
+
+def xpath_class(name):
+    """
+    XPath predicate matching one CSS class
+    """
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+class LxmlParser:
+    """
+    lxml backend of the registry page parsers.
+
+    Only the nodes the parsers read are visited, through precompiled XPath
+    expressions, and the document is built by libxml2 instead of in Python.
+    """
+
+    name = "lxml"
+
+    def __init__(self):
+        self._qbcc_cells = lxml.etree.XPath(
+            f"//table[@id='{QBCC_LICENCE_CLASS_TABLE}']//td"
+        )
+        self._search_results = lxml.etree.XPath(
+            f"(//*[{xpath_class('search-results')}])[1]"
+        )
+        self._all_search_results = lxml.etree.XPath(
+            f"//*[{xpath_class('search-results')}]"
+        )
+        self._party_fields = lxml.etree.XPath(
+            f"//*[{xpath_class('PanelFieldValue')}]/span"
+        )
+        self._title = lxml.etree.XPath("string((//title)[1])")
+
+    @staticmethod
+    def _document(html):
+        if not html or not html.strip():
+            return None
+        try:
+            return lxml.html.document_fromstring(html)
+        except ValueError:
+            # str pages with an <?xml encoding=...?> declaration
+            return lxml.html.document_fromstring(html.encode("utf-8"))
+        except lxml.etree.ParserError:
+            return None
+
+    def qbcc_cells(self, html):
+        """
+        text of the cells of the licence class table
+        """
+        doc = self._document(html)
+        if doc is None:
+            return []
+        return [td.text_content().strip("\r\n\t ") for td in self._qbcc_cells(doc)]
+
+    def surveyor_fields(self, html):
+        """
+        raw fields of the first .search-results block, None when absent
+        """
+        doc = self._document(html)
+        found = self._search_results(doc) if doc is not None else []
+        if found:
+            return self._surveyor_block(found[0])
+
+    def surveyor_entries(self, html):
+        """
+        raw fields of every .search-results block
+        """
+        doc = self._document(html)
+        if doc is None:
+            return []
+        return [self._surveyor_block(e) for e in self._all_search_results(doc)]
+
+    @staticmethod
+    def _surveyor_block(element):
+        def next_cell(label, separator=""):
+            # same match as bs4's string=: a cell holding only that text
+            for td in element.iterfind(".//td"):
+                if len(td) == 0 and td.text == label:
+                    cell = td.xpath("following-sibling::td[1]")
+                    if cell:
+                        return separator.join(cell[0].xpath("descendant::text()"))
+            return ""
+
+        return {
+            "heading": "<br>".join(element.find(".//h4").xpath("descendant::text()")),
+            "phone": next_cell("Phone "),
+            "email": next_cell("Email "),
+            "address": next_cell("Address", separator=", "),
+            "company": next_cell("Company "),
+            "types": [
+                span.text_content()
+                for span in element.xpath(f".//div[{xpath_class('types')}]")[
+                    0
+                ].iterfind(".//span")
+            ],
+        }
+
+    def party_fields(self, html):
+        """
+        page title and .PanelFieldValue spans of an iMIS Party.aspx page
+        """
+        doc = self._document(html)
+        if doc is None:
+            return None, []
+        parts = [p.text_content().strip("\r\n\t ") for p in self._party_fields(doc)]
+        return (self._title(doc) if doc.find(".//title") is not None else None), parts
+
+
+HTML_PARSERS = {"bs4": SoupParser}
+if lxml is not None:
+    HTML_PARSERS["lxml"] = LxmlParser
+
+html_parser = HTML_PARSERS["lxml" if lxml is not None else "bs4"]()
+
+
+def configure_html_parser(config):
+    """
+    select the html_parser backend from config, the fastest one available
+    when not set
+    """
+    global html_parser
+    name = config.get("html_parser") or ("lxml" if lxml is not None else "bs4")
+    if name not in HTML_PARSERS:
+        logger.info("HTML parser %s is not available, using bs4.", name)
+        name = "bs4"
+    if html_parser.name != name:
+        html_parser = HTML_PARSERS[name]()
+    return html_parser
+
+
+def parse_qbcc_response(html):
+    with run_stats.timed("parse"):
+        items = html_parser.qbcc_cells(html)
+
+    if len(items) > 0 and (len(items) % 4) == 0:
+        for start in range(0, len(items), 4):
+            yield [p.strip() for p in items[start : start + 4]]
+
+
+def parse_surveyor_response(html_content):
+    """
+    parse surveyor response
+    """
+    with run_stats.timed("parse"):
+        fields = html_parser.surveyor_fields(html_content)
+    if fields:
+        return surveyor_entry(fields)
+
+
+def parse_surveyor_entries(html_content):
+    """
+    parse every surveyor of a search results page
+    """
+    with run_stats.timed("parse"):
+        entries = html_parser.surveyor_entries(html_content)
+    return [surveyor_entry(fields) for fields in entries]
+
+
+def surveyor_entry(fields):
+    """
+    surveyor result from the raw fields of a .search-results block
+    """
+    # the heading holds the name and the licence class
+    name = fields["heading"].split("<br>")[0]
+    lic_class = fields["heading"].split("<br>")[-1]
+
+    return {
+        "name": re.sub(r"\s+", " ", name).strip(),
+        "license_class": re.sub(r"\s+", " ", lic_class).strip(),
+        "phone": fields["phone"],
+        "email": fields["email"],
+        "address": fields["address"],
+        "expertise": "; ".join(fields["types"]),
+        "company": fields["company"].strip(),
+    }
+
+
+QBCC_CONTRACTOR_SEARCH_URL = "https://www.onlineservices.qbcc.qld.gov.au/OnlineLicenceSearch/VisualElements/SearchBSALicenseeContent.aspx"
+QBCC_CERTIFIER_SEARCH_URL = "https://www.onlineservices.qbcc.qld.gov.au/OnlineLicenceSearch/VisualElements/SearchBuildingCertifierContent.aspx"
+QBCC_DETAIL_URL = "https://www.onlineservices.qbcc.qld.gov.au/OnlineLicenceSearch/VisualElements/ShowDetailResultContent.aspx"
+
+SURVEYOR_SEARCH_URL = "https://sbq.com.au/find-a-surveyor/search-cadastral/"
+SURVEYOR_HEADERS = {
+    "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
+    "accept-language": "en-US,en;q=0.7",
+    "cache-control": "no-cache",
+    "pragma": "no-cache",
+    "referer": "https://sbq.com.au/find-a-surveyor/search-cadastral/",
+    "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36",
+}
+
+
+def qbcc_detail_params(license_no, search_type):
+    """
+    query string of the QBCC licence detail page
+    """
+    license_no = f"{license_no}".strip("\r\n\t ")
+    return {
+        "LicNO": f"{license_no}",
+        "licCat": "LIC",
+        "name": "",
+        "firstName": "",
+        "searchType": search_type,
+        "FromPage": "SearchContr",
+    }
+
+
+def surveyor_search_params(search_text):
+    """
+    query string of the SBQ cadastral surveyor search
+    """
+    return {
+        "surveyor-type": "individual",
+        "search-type": "name",
+        "title": search_text,
+        "postcode": "",
+        "radius": "5",
+        "q": "Search",
+    }
+
+
+@cached_lookup("surveyor")
+def query_surveyor_license(search_text):
+    """
+    query surveyor license
+    """
+    search_text = re.sub(r"\s+", " ", f"{search_text}".strip())
+    logger.info("Looking up surveyor info: %s", search_text)
+    params = surveyor_search_params(search_text)
+
+    response = surveyor_session.get(SURVEYOR_SEARCH_URL, params=params)
+    return parse_surveyor_response(response.text)
+
+
+class RegistrySession:
+    """
+    Keeps the search page of a registry warm on its own pooled requests
+    session.
+
+    The search page is loaded before the first lookup and again only when
+    one of the registry cookies has expired or a lookup response shows the
+    server side session went stale (auth error or a redirect away from the
+    requested page).
+    """
+
+    STALE_STATUS_CODES = (401, 403, 440)
+
+    def __init__(self, warmup_url, http=None):
+        self.warmup_url = warmup_url
+        self.http = http or pooled_session(dict(session.headers, Referer=warmup_url))
+        self.host = urllib.parse.urlsplit(warmup_url).hostname
+        self._warmed = False
+        self._lock = threading.Lock()
+
+    def _cookies_expired(self):
+        now = time.time()
+        return any(
+            cookie.expires and cookie.expires <= now
+            for cookie in self.http.cookies
+            if self.host.endswith(cookie.domain.lstrip("."))
+        )
+
+    def warm_up(self, force=False):
+        """
+        load the search page unless the session is still fresh
+        """
+        with self._lock:
+            if force or not self._warmed or self._cookies_expired():
+                logger.debug("Warming up %s", self.warmup_url)
+                with run_stats.phase("warm_up"):
+                    http_request("GET", self.warmup_url, http=self.http)
+                self._warmed = True
+
+    def is_stale(self, url, response):
+        """
+        check if a lookup response shows an expired server side session
+        """
+        if response.status_code in self.STALE_STATUS_CODES:
+            return True
+
+        requested = urllib.parse.urlsplit(url).path.lower()
+        landed = urllib.parse.urlsplit(response.url).path.lower()
+        return bool(response.history) and requested != landed
+
+    def get(self, url, **kwargs):
+        """
+        GET a lookup page, warming the session up again once if it is stale.
+        Raises TransientLookupError when the page still does not load, an
+        error page must not read as a licence missing from the register.
+        """
+        self.warm_up()
+        response = http_request("GET", url, http=self.http, **kwargs)
+        if self.is_stale(url, response):
+            logger.info("Session of %s is stale, warming up again.", self.host)
+            self.warm_up(force=True)
+            response = http_request("GET", url, http=self.http, **kwargs)
+
+        if response.status_code != 200:
+            raise TransientLookupError(
+                f"{self.host} returned HTTP {response.status_code}"
+            )
+        return response
+
+
+qbcc_contractor_session = RegistrySession(QBCC_CONTRACTOR_SEARCH_URL)
+qbcc_certifier_session = RegistrySession(QBCC_CERTIFIER_SEARCH_URL)
+surveyor_session = RegistrySession(
+    SURVEYOR_SEARCH_URL, http=pooled_session(SURVEYOR_HEADERS)
+)
+
+
+@cached_lookup("qbcc")
+def query_qbcc_license(license_no):
+    """
+    query qbcc license
+    """
+    params = qbcc_detail_params(license_no, "Contractor")
+    response = qbcc_contractor_session.get(QBCC_DETAIL_URL, params=params)
+    for r in parse_qbcc_response(response.text):
+        yield r
+
+
+@cached_lookup("qbcc_certifier")
+def query_qbcc_certifier_license(license_no):
+    """
+    query_qbcc_certifier_license
+    """
+    params = qbcc_detail_params(license_no, "Certifier")
+    response = qbcc_certifier_session.get(QBCC_DETAIL_URL, params=params)
+    for r in parse_qbcc_response(response.text):
+        yield r
+
+
+BPEQ_SEARCH_URL = "https://portal.bpeq.qld.gov.au/BPEQPortal/RPEQ_Directory.aspx"
+BPEQ_PARTY_URL = "https://portal.bpeq.qld.gov.au/Party.aspx?ID="
+BOAQ_SEARCH_URL = "https://www.boaq.qld.gov.au/Web/Consumers/Search_the_Register/Web/Architect_Search.aspx?hkey=f493b110-1ad9-4ec8-a830-f9a1f70e16b5"
+BOAQ_PARTY_URL = "https://www.boaq.qld.gov.au/Party.aspx?ID="
+
+
+@cached_lookup("engineers")
+def query_engr_registration(license_number, driver: "Chrome"):
+    """
+    query_engr_registration
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    try:
+        url1 = BPEQ_SEARCH_URL
+        driver.get(url1)
+        element = WebDriverWait(driver, 16).until(
+            EC.presence_of_element_located(
+                (
+                    By.ID,
+                    "ctl01_TemplateBody_WebPartManager1_gwpciEngineersearch_ciEngineersearch_ResultsGrid_Sheet0_Input3_TextBox1",
+                )
+            )
+        )
+        element.send_keys(license_number)
+        element = WebDriverWait(driver, 16).until(
+            EC.presence_of_element_located(
+                (
+                    By.ID,
+                    "ctl01_TemplateBody_WebPartManager1_gwpciEngineersearch_ciEngineersearch_ResultsGrid_Sheet0_SubmitButton",
+                )
+            )
+        )
+        element.click()
+        element = WebDriverWait(driver, 16).until(
+            EC.presence_of_element_located(
+                (
+                    By.XPATH,
+                    '//*[@id="ctl01_TemplateBody_WebPartManager1_gwpciEngineersearch_ciEngineersearch_ResultsGrid_Grid1_ctl00__0"]/td[1]/a',
+                )
+            )
+        )
+        registration_no = element.get_attribute("href").split("=")[1]
+
+        url = f"{BPEQ_PARTY_URL}{registration_no}"
+        response = driver.request("GET", url, verify=False)
+        return parse_engr_party(response.text)
+
+    except Exception as e:
+        logger.info(e)
+
+
+def parse_engr_party(html):
+    """
+    parse a BPEQ Party.aspx page
+    """
+    with run_stats.timed("parse"):
+        title, parts = html_parser.party_fields(html)
+    logger.info("Num Parts: %d", len(parts))
+
+    name = title.strip("\r\n\t")
+    date_registered_from = parts[0]
+    status = parts[3]
+    date_registered_to = parts[4]
+    company = parts[5]
+    job_type = parts[1]
+
+    return {
+        "name": name,
+        "company": company,
+        "date_registered_from": date_registered_from,
+        "job_type": job_type,
+        "status": status,
+        "date_registered_to": date_registered_to,
+    }
+
+
+@cached_lookup("architects")
+def query_arch_registration(license_number, driver: "Chrome"):
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    try:
+        url1 = BOAQ_SEARCH_URL
+        driver.get(url1)
+        element = WebDriverWait(driver, 16).until(
+            EC.presence_of_element_located(
+                (
+                    By.ID,
+                    "ctl01_TemplateBody_WebPartManager1_gwpciArchitectsearch_ciArchitectsearch_ResultsGrid_Sheet0_Input3_TextBox1",
+                )
+            )
+        )
+        element.send_keys(license_number)
+        element = WebDriverWait(driver, 16).until(
+            EC.presence_of_element_located(
+                (
+                    By.NAME,
+                    "ctl01$TemplateBody$WebPartManager1$gwpciArchitectsearch$ciArchitectsearch$ResultsGrid$Sheet0$SubmitButton",
+                )
+            )
+        )
+        element.click()
+        element = WebDriverWait(driver, 16).until(
+            EC.presence_of_element_located(
+                (
+                    By.XPATH,
+                    '//*[@id="ctl01_TemplateBody_WebPartManager1_gwpciArchitectsearch_ciArchitectsearch_ResultsGrid_Grid1_ctl00__0"]/td[1]/a',
+                )
+            )
+        )
+        registration_no = element.get_attribute("href").split("=")[1]
+        url = f"{BOAQ_PARTY_URL}{registration_no}"
+        response = driver.request("GET", url)
+        return parse_arch_party(response.text)
+
+    except Exception as e:
+        logger.info(e)
+
+
+def parse_arch_party(html):
+    """
+    parse a BOAQ Party.aspx page
+    """
+    with run_stats.timed("parse"):
+        _, parts = html_parser.party_fields(html)
+    logger.info("Num Parts: %d", len(parts))
+    if len(parts) == 12:
+        name = parts[0]
+        company = parts[1]
+        job_type = parts[2]
+        date_joined = parts[4]
+        status = parts[3]
+        date_registered = parts[4]
+
+        return name, company, date_joined, job_type, status, date_registered
+    elif len(parts) == 11:
+        name = parts[0]
+        date_joined = parts[3]
+        job_type = parts[1]
+        status = parts[2]
+        date_registered = parts[3]
+
+        return name, None, date_joined, job_type, status, date_registered
+
+
+class IMISSearchClient:
+    """
+    Browserless client of an iMIS (ASP.NET WebForms) register search.
+
+    The search page is loaded once for its hidden form state (__VIEWSTATE,
+    __EVENTVALIDATION, ...), which is posted back with the licence number
+    as if the search button had been clicked. The form state is reloaded
+    when a post back does not return the results grid.
+    """
+
+    def __init__(self, search_url, party_url, grid_prefix, verify=True):
+        self.search_url = search_url
+        self.party_url = party_url
+        self.input_id = f"{grid_prefix}_Sheet0_Input3_TextBox1"
+        self.submit_id = f"{grid_prefix}_Sheet0_SubmitButton"
+        self.result_id = f"{grid_prefix}_Grid1_ctl00__0"
+        self.grid_id = f"{grid_prefix}_Grid1"
+        self.verify = verify
+        self.http = pooled_session(session.headers)
+        self._form = None
+        self._lock = threading.Lock()
+
+    def _load_form(self):
+        with run_stats.phase("warm_up"):
+            response = http_request(
+                "GET", self.search_url, http=self.http, verify=self.verify
+            )
+        soup = make_soup(response.text)
+        fields = {
+            field["name"]: field.get("value", "")
+            for field in soup.select("input[type=hidden][name]")
+        }
+        search_input = soup.find("input", id=self.input_id)
+        submit = soup.find("input", id=self.submit_id)
+        if not search_input or not submit:
+            # maintenance or a changed page, not an unknown licence
+            raise TransientLookupError(f"Search form not found on {self.search_url}")
+
+        form_url = urllib.parse.urljoin(
+            response.url, (soup.find("form") or {}).get("action") or self.search_url
+        )
+        return form_url, fields, search_input["name"], submit["name"], submit.get(
+            "value", ""
+        )
+
+    def _form_state(self, stale=None):
+        with self._lock:
+            if self._form is None or self._form is stale:
+                self._form = self._load_form()
+            return self._form
+
+    def _post_search(self, form, license_number):
+        form_url, fields, input_name, submit_name, submit_value = form
+        data = dict(fields)
+        data[input_name] = license_number
+        data[submit_name] = submit_value
+        return http_request(
+            "POST", form_url, http=self.http, data=data, verify=self.verify
+        )
+
+    def find_registration_no(self, license_number):
+        """
+        Search a licence number and return the Party.aspx ID of the first
+        result, None when nothing was found.
+        """
+        form = self._form_state()
+        response = self._post_search(form, license_number)
+        if response.status_code != 200 or self.grid_id not in response.text:
+            form = self._form_state(stale=form)
+            response = self._post_search(form, license_number)
+            if response.status_code != 200 or self.grid_id not in response.text:
+                raise TransientLookupError(
+                    f"No results grid from {self.search_url} "
+                    f"(HTTP {response.status_code})"
+                )
+
+        soup = make_soup(response.text)
+        link = soup.select_one(f"tr[id='{self.result_id}'] > td a[href]")
+        if link:
+            return link["href"].split("=")[1]
+
+    def party_page(self, license_number):
+        """
+        HTML of the Party.aspx page of a licence number
+        """
+        registration_no = self.find_registration_no(license_number)
+        if not registration_no:
+            return
+
+        url = f"{self.party_url}{registration_no}"
+        response = http_request("GET", url, http=self.http, verify=self.verify)
+        if response.status_code != 200:
+            raise TransientLookupError(f"{url} returned HTTP {response.status_code}")
+        return response.text
+
+
+bpeq_client = IMISSearchClient(
+    BPEQ_SEARCH_URL,
+    BPEQ_PARTY_URL,
+    "ctl01_TemplateBody_WebPartManager1_gwpciEngineersearch_ciEngineersearch_ResultsGrid",
+    verify=False,
+)
+boaq_client = IMISSearchClient(
+    BOAQ_SEARCH_URL,
+    BOAQ_PARTY_URL,
+    "ctl01_TemplateBody_WebPartManager1_gwpciArchitectsearch_ciArchitectsearch_ResultsGrid",
+)
+
+
+@cached_lookup("engineers")
+def query_engr_registration_http(license_number):
+    """
+    query_engr_registration without a browser
+    """
+    html = bpeq_client.party_page(license_number)
+    if not html:
+        return
+
+    try:
+        result = parse_engr_party(html)
+    except (AttributeError, IndexError) as e:
+        result = None
+        logger.info(e)
+    if result is None:
+        # the register has the licence, its page is not what we expect
+        raise TransientLookupError(
+            f"Party page of {license_number} could not be parsed"
+        )
+    return result
+
+
+@cached_lookup("architects")
+def query_arch_registration_http(license_number):
+    """
+    query_arch_registration without a browser
+    """
+    html = boaq_client.party_page(license_number)
+    if not html:
+        return
+
+    try:
+        result = parse_arch_party(html)
+    except (AttributeError, IndexError) as e:
+        result = None
+        logger.info(e)
+    if result is None:
+        # the register has the licence, its page is not what we expect
+        raise TransientLookupError(
+            f"Party page of {license_number} could not be parsed"
+        )
+    return result
+
+
+def registration_lookups(config, browser_querier, http_querier, keys):
+    """
+    Look up registration numbers in the browser pool when with_browser is
+    set, otherwise over plain HTTP. Results are yielded in the order of keys,
+    a TransientLookupError instead of the result of a failed lookup.
+    """
+    if config.get("with_browser", False):
+        yield from browser_pool.map(browser_querier, keys)
+        return
+
+    def lookup(key):
+        logger.info("Fetching Registration info of %s:", key)
+        try:
+            return http_querier(key)
+        except TransientLookupError as e:
+            return e
+
+    workers = config.get("lookup_workers", 1)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        yield from executor.map(lookup, keys)
+
+
+def process_sheet_arch(wb, sheetname, args, config, sheet_config, orig_filename):
+    """
+    process_sheet_arch
+    """
+    logger.info("Processing Architects Tab...")
+    sheet = wb[sheetname]
+
+    pending = []
+    for row, data in iter_sheet_rows(sheet, sheet_config, config=config):
+        if should_skip_row(row, sheet_config, config):
+            continue
+
+        pending.append((row, str(row[sheet_config["license_index"]].value or "")))
+
+    lookups = registration_lookups(
+        config,
+        query_arch_registration,
+        query_arch_registration_http,
+        [registration_no for _, registration_no in pending],
+    )
+    for (row, registration_no), reg_status in zip(pending, lookups):
+        try_save(wb, config, orig_filename)
+
+        if isinstance(reg_status, TransientLookupError):
+            skip_transient_row(row, reg_status)
+        elif reg_status:
+            logger.info("Registration info found!")
+
+            name, company, date_joined, job_type, status, date_registered = reg_status
+
+            # lic_class, _, _, lic_status = lic_statuses[0]
+            logger.info("\tName: %s", name)
+            logger.info("\tCompany: %s", company)
+            logger.info("\tDate Joined: %s", date_joined)
+            logger.info("\tType: %s", job_type)
+            logger.info("\tStatus: %s", status)
+            logger.info("\tDate Registered: %s", date_registered)
+
+            update_license_status(row, status.strip().title(), sheet_config)
+        else:
+            logger.info("Registration info not found in online register !")
+            update_license_status(row, "Missing in Register", sheet_config)
+
+
+def init_web_driver(headless=False):
     """
     init_chrome
     """
-    options = ChromeOptions()
-    # chrome-win64\chrome.exe
-    options.binary_location = os.path.join("chrome-win64", "chrome.exe")
-    # options.add_argument("headless")
-    driver = Chrome(options=options)
-    return driver
+    from selenium.webdriver import ChromeOptions
+    from seleniumrequests import Chrome
+
+    options = ChromeOptions()
+    # chrome-win64\chrome.exe
+    options.binary_location = os.path.join("chrome-win64", "chrome.exe")
+    if headless:
+        options.add_argument("--headless=new")
+    driver = Chrome(options=options)
+    return driver
+
+
+class BrowserPool:
+    """
+    Pool of Chrome drivers shared by the architect and engineer tabs.
+
+    Drivers are started on demand up to the pool size, health-checked
+    before every use and recycled after max_pages lookups. A driver that
+    is quit gives its slot back, the next lookup starts a new one.
+    """
+
+    def __init__(self):
+        self.size = 1
+        self.max_pages = 200
+        self.headless = True
+        self.acquire_timeout = 300
+        self._idle = queue.Queue()
+        self._pages = {}
+        self._started = 0
+        self._lock = threading.Lock()
+
+    def configure(self, config):
+        """
+        load pool settings from config
+        """
+        pool_config = config.get("browser_pool") or {}
+        self.size = max(1, pool_config.get("size") or min(4, os.cpu_count() or 1))
+        self.max_pages = pool_config.get("max_pages", 200)
+        self.headless = pool_config.get("headless", True)
+        self.acquire_timeout = pool_config.get("acquire_timeout", 300)
+
+    def _start(self):
+        with run_stats.timed("browser_start", "browser"):
+            driver = init_web_driver(headless=self.headless)
+        self._pages[id(driver)] = 0
+        return driver
+
+    def _quit(self, driver):
+        self._pages.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.debug("Failed to quit driver: %s", e)
+
+    @staticmethod
+    def _healthy(driver):
+        try:
+            driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, driver):
+        """
+        quit a driver and give its slot back
+        """
+        self._quit(driver)
+        with self._lock:
+            self._started -= 1
+
+    def _acquire(self):
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            with self._lock:
+                start = self._idle.empty() and self._started < self.size
+                if start:
+                    self._started += 1
+
+            if start:
+                try:
+                    return self._start()
+                except Exception:
+                    with self._lock:
+                        self._started -= 1
+                    raise
+
+            # wake up now and then, a slot may have been given back
+            try:
+                driver = self._idle.get(timeout=1)
+            except queue.Empty:
+                if time.monotonic() > deadline:
+                    raise TransientLookupError(
+                        f"no browser available after {self.acquire_timeout}s"
+                    )
+                continue
+
+            if self._healthy(driver):
+                return driver
+
+            logger.info("Replacing unresponsive browser.")
+            self._discard(driver)
+
+    def _release(self, driver):
+        self._pages[id(driver)] = self._pages.get(id(driver), 0) + 1
+        if self.max_pages and self._pages[id(driver)] >= self.max_pages:
+            logger.info("Recycling browser after %d pages.", self.max_pages)
+            self._discard(driver)
+            return
+
+        self._idle.put(driver)
+
+    @contextmanager
+    def driver(self):
+        """
+        borrow a driver from the pool
+        """
+        driver = self._acquire()
+        try:
+            yield driver
+        finally:
+            self._release(driver)
+
+    def map(self, querier, keys):
+        """
+        Run querier(key, driver) for every key spread across the pool,
+        yielding the results in the order of keys.
+        """
+
+        def lookup(key):
+            logger.info("Fetching Registration info of %s:", key)
+            try:
+                with self.driver() as driver:
+                    return querier(key, driver)
+            except TransientLookupError as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            yield from executor.map(lookup, keys)
+
+    def shutdown(self):
+        """
+        quit every started driver
+        """
+        with self._lock:
+            while not self._idle.empty():
+                self._quit(self._idle.get_nowait())
+            self._started = 0
+
+
+browser_pool = BrowserPool()
+
+
+def process_sheet_engr(wb, sheetname, args, config, sheet_config, orig_filename):
+    """
+    process_sheet_engr
+    """
+    logger.info("Processing Engineers Tab...")
+    sheet = wb[sheetname]
+
+    pending = []
+    for row, data in iter_sheet_rows(sheet, sheet_config, config=config):
+        if should_skip_row(row, sheet_config, config):
+            continue
+
+        pending.append((row, str(row[sheet_config["license_index"]].value or "")))
+
+    lookups = registration_lookups(
+        config,
+        query_engr_registration,
+        query_engr_registration_http,
+        [license_number for _, license_number in pending],
+    )
+    for (row, license_number), reg_status in zip(pending, lookups):
+        try_save(wb, config, orig_filename)
+
+        if isinstance(reg_status, TransientLookupError):
+            skip_transient_row(row, reg_status)
+        elif reg_status:
+            logger.info("Registration info found!")
+
+            # name, company, date_registered_from, job_type, status, date_registered = reg_status
+            # return name, company, date_registered_from, job_type, status, date_registered_to
+            # lic_class, _, _, lic_status = lic_statuses[0]
+
+            status = reg_status["status"]
+
+            logger.info("\tName: %s", reg_status["name"])
+            logger.info("\tCompany: %s", reg_status["company"])
+            logger.info(
+                "\tDate Registered From: %s", reg_status["date_registered_from"]
+            )
+            logger.info("\tType: %s", reg_status["job_type"])
+            logger.info("\tStatus: %s", reg_status["status"])
+            logger.info("\tDate Registered To: %s", reg_status["date_registered_to"])
+
+            update_license_status(row, status.strip().title(), sheet_config)
+        else:
+            logger.info("Registration info not found in online register !")
+            update_license_status(row, "Missing in Register", sheet_config)
+
+
+def update_license_status(row, status, sheet_config):
+    """Helper function to update status and last checked date for a row."""
+    started = time.monotonic()
+    last_checked = datetime.now().date()
+    row[sheet_config["status_index"]].value = status
+    row[sheet_config["last_checked_index"]].value = last_checked
+    progress_journal.record(
+        row,
+        sheet_config["status_index"],
+        status,
+        sheet_config["last_checked_index"],
+        last_checked,
+    )
+    resume_index.record(row, sheet_config)
+    run_stats.record("write", time.monotonic() - started, RunStats.WORKBOOK)
+    run_stats.count_row(row.sheet.title)
+
+
+# honorifics and company suffixes left out of surveyor name matching
+SURVEYOR_NAME_NOISE = {"mr", "mrs", "ms", "miss", "dr", "pty", "ltd", "limited", "the"}
+
+
+def name_tokens(text):
+    """
+    lowercase words of a person or company name, without punctuation
+    """
+    words = re.sub(r"[^0-9a-z]+", " ", f"{text}".lower()).split()
+    return tuple(word for word in words if word not in SURVEYOR_NAME_NOISE)
+
+
+def token_score(query, tokens):
+    """
+    Share of the query words found in tokens, allowing initials, shortened
+    words and small typos. 0 when a one word query is matched against a
+    longer name.
+    """
+    if len(query) < 2 and len(tokens) > 1:
+        return 0
+
+    total = 0
+    for word in query:
+        best = 0
+        for token in tokens:
+            if word == token:
+                best = 1
+                break
+            if token.startswith(word):
+                # initials and shortened first names
+                best = max(best, 0.9)
+            else:
+                best = max(best, difflib.SequenceMatcher(None, word, token).ratio())
+        total = total + best
+    return total / len(query)
+
+
+class SurveyorRegister:
+    """
+    In-memory index of the SBQ cadastral surveyor register keyed by
+    normalised name and company.
+
+    Word order and honorifics are ignored. Names that are not an exact
+    match are scored word by word against the surveyors sharing a word
+    prefix with them. Only a single match with every word of the name is
+    trusted, a close match of at least min_score ("J Smith", "Joan Smith"
+    for John Smith) may be someone else and is searched live.
+    """
+
+    def __init__(self, surveyors, min_score=0.85):
+        self.surveyors = surveyors
+        self.min_score = min_score
+        self.exact = {}
+        self.tokens = {}
+        self.prefixes = {}
+        for position, surveyor in enumerate(surveyors):
+            for field in ("name", "company"):
+                tokens = name_tokens(surveyor.get(field) or "")
+                if not tokens:
+                    continue
+                self.exact.setdefault(" ".join(sorted(tokens)), position)
+                self.tokens[(position, field)] = tokens
+                for token in tokens:
+                    self.prefixes.setdefault(token[:3], set()).add((position, field))
+
+    def __len__(self):
+        return len(self.surveyors)
+
+    def match(self, search_text):
+        """
+        Return (surveyor, score) of the best unambiguous match of at least
+        min_score, score 1 when every word of search_text is in the name.
+        (None, 0) when there is no such match.
+        """
+        query = name_tokens(search_text)
+        if not query:
+            return None, 0
+
+        position = self.exact.get(" ".join(sorted(query)))
+        if position is not None:
+            return dict(self.surveyors[position]), 1
+
+        scores = {}
+        for word in query:
+            for candidate in self.prefixes.get(word[:3], ()):
+                surveyor = candidate[0]
+                scores[surveyor] = max(
+                    scores.get(surveyor, 0),
+                    token_score(query, self.tokens[candidate]),
+                )
+
+        matches = [p for p, score in scores.items() if score >= self.min_score]
+        best = max((scores[p] for p in matches), default=0)
+        matches = [p for p in matches if scores[p] == best]
+        if len(matches) != 1:
+            return None, 0
+        return dict(self.surveyors[matches[0]]), best
+
+    def lookup(self, search_text):
+        """
+        same result as query_surveyor_license, without a network call, for
+        names matched exactly. None when the name has to be searched live.
+        """
+        surveyor, score = self.match(search_text)
+        if surveyor and score < 1:
+            logger.info(
+                "Surveyor %s is close to %s in the register, searching live.",
+                search_text,
+                surveyor["name"],
+            )
+            return
+        return surveyor
+
+    def lookup_keys(self, keys):
+        """
+        result of the first search key of a row found in the register
+        """
+        for key in keys:
+            result = self.lookup(key)
+            if result:
+                return result
+
+
+def crawl_surveyor_register(search_terms):
+    """
+    download the surveyor register with one search per search term
+    """
+    surveyors = {}
+    for term in search_terms:
+        response = surveyor_session.get(
+            SURVEYOR_SEARCH_URL, params=surveyor_search_params(term)
+        )
+        for entry in parse_surveyor_entries(response.text):
+            key = (entry["name"], entry["license_class"], entry["email"])
+            surveyors.setdefault(key, entry)
+        logger.info("Downloaded %d surveyors (search %s)", len(surveyors), term)
+
+    return list(surveyors.values())
+
+
+def load_surveyor_register(config):
+    """
+    Load the surveyor register snapshot when surveyor_snapshot is enabled in
+    config.yml, downloading it again when it is older than ttl_days. Returns
+    None when snapshot mode is off or there is no snapshot, in which case
+    rows are looked up one at a time.
+    """
+    snapshot_config = config.get("surveyor_snapshot") or {}
+    if not snapshot_config.get("enabled", False):
+        return
+
+    path = snapshot_config.get("path", "surveyor_snapshot.json")
+    ttl_seconds = snapshot_config.get("ttl_days", 7) * 86400
+    fresh = os.path.exists(path) and time.time() - os.path.getmtime(path) < ttl_seconds
+
+    surveyors = None
+    if not fresh:
+        logger.info("Downloading surveyor register...")
+        try:
+            surveyors = crawl_surveyor_register(
+                snapshot_config.get("search_terms", "abcdefghijklmnopqrstuvwxyz")
+            )
+        except TransientLookupError as e:
+            # an outdated snapshot still beats a live search per row
+            logger.warning("Surveyor register download failed: %s", e)
+        else:
+            if surveyors:
+                with open(f"{path}.tmp", "wt", encoding="utf-8") as fp:
+                    json.dump(surveyors, fp)
+                os.replace(f"{path}.tmp", path)
+
+    if not surveyors and os.path.exists(path):
+        with open(path, "rt", encoding="utf-8") as fp:
+            surveyors = json.load(fp)
+
+    register = SurveyorRegister(
+        surveyors or [], min_score=snapshot_config.get("min_score", 0.85)
+    )
+    if not register:
+        logger.warning("Surveyor register is empty, using live lookups.")
+        return
+
+    logger.info("Indexed %d surveyors.", len(register))
+    return register
+
+
+def process_sheet_surveyor(wb, sheetname, args, config, sheet_config, orig_filename):
+    """
+    process_sheet_surveyor
+    """
+    logger.info("Processing Surveyor Tab: %s...", sheetname)
+    register = load_surveyor_register(config)
+
+    sheet = wb[sheetname]
+
+    for row, data in iter_sheet_rows(sheet, sheet_config, config=config):
+        try_save(wb, config, orig_filename)
+
+        # Skip rows with a recent "last checked" date
+        if should_skip_row(row, sheet_config, config):
+            continue
+
+        # name first when there is one, the company as fallback
+        keys = row_lookup_keys("surveyor", row, data, sheet_config)
+        try:
+            result = register.lookup_keys(keys) if register else None
+            if not result:
+                result = first_match(query_surveyor_license, keys)
+        except TransientLookupError as e:
+            skip_transient_row(row, e)
+            continue
+
+        update_license_status(
+            row, lookup_result_status("surveyor", result), sheet_config
+        )
+
+
+def should_skip_row(row, sheet_config, cfg):
+    """Check if the row should be skipped based on last checked date."""
+    # finished by an interrupted run of the same workbook
+    if resume_index.is_finished(row, sheet_config):
+        return True
+
+    last_date_checked = row[sheet_config["last_checked_index"]].value
+    if last_date_checked and isinstance(last_date_checked, datetime):
+        last_date_checked = last_date_checked.date()
+
+    # dates written (or replayed from the journal) during this run are
+    # plain dates until the workbook is reloaded
+    if last_date_checked and isinstance(last_date_checked, date):
+        delta = datetime.now().date() - last_date_checked
+        return delta.days <= cfg.get("skip_days", 5)
+    else:
+        return False
+
+
+POOL_SAFETY_SEARCH_URL = "https://my.qbcc.qld.gov.au/s/pool-safety-inspector-search"
+POOL_SAFETY_AURA_URL = (
+    "https://my.qbcc.qld.gov.au/s/sfsites/aura?other.PSISearch.searchInspectors=1"
+)
+POOL_SAFETY_HEADERS = {
+    "accept": "*/*",
+    "accept-language": "en-US,en;q=0.9",
+    "cache-control": "no-cache",
+    "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
+    "origin": "https://my.qbcc.qld.gov.au",
+    "pragma": "no-cache",
+    "priority": "u=1, i",
+    "referer": "https://my.qbcc.qld.gov.au/s/pool-safety-inspector-search",
+    "sec-ch-ua": '"Brave";v="129", "Not=A?Brand";v="8", "Chromium";v="129"',
+    "sec-ch-ua-mobile": "?0",
+    "sec-ch-ua-platform": '"Windows"',
+    "sec-fetch-dest": "empty",
+    "sec-fetch-mode": "cors",
+    "sec-fetch-site": "same-origin",
+    "sec-gpc": "1",
+    "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Safari/537.36",
+    # 'x-sfdc-page-scope-id': '3bdc58c4-042b-42d8-8bcd-b875c8aa3bfb',
+    # 'x-sfdc-request-id': '415150000004b0f99f',
+}
+POOL_SAFETY_AURA_CONTEXT = '{"mode":"PROD","fwuid":"eGx3MHlRT1lEMUpQaWVxbGRUM1h0Z2hZX25NdHFVdGpDN3BnWlROY1ZGT3cyNTAuOC40LTYuNC41","app":"siteforce:communityApp","loaded":{"APPLICATION@markup://siteforce:communityApp":"wi0I2YUoyrm6Lo80fhxdzA","COMPONENT@markup://instrumentation:o11ySecondaryLoader":"1JitVv-ZC5qlK6HkuofJqQ"},"dn":[],"globals":{},"uad":false}'
+
+
+def pool_safety_aura_headers(render_ctx, sfdc_req_id):
+    """
+    Build the X-Sfdc-* headers from the renderCtx cookie and the
+    x-sfdc-request-id header of the search page.
+    """
+    context_decoded = json.loads(urllib.parse.unquote(render_ctx))
+    return {
+        # "x-request-id":req_id,
+        "X-Sfdc-Request-Id": sfdc_req_id,
+        "X-Sfdc-Page-Scope-Id": context_decoded.get("pageId"),
+    }
+
+
+def pool_safety_aura_payload(lic_no, search_by="licence", batch_size=1000, offset=0):
+    """
+    form data of a searchInspectors action for a licence number
+    """
+    action = {
+        "id": "175;a",
+        "descriptor": "apex://PSISearchController/ACTION$searchInspectors",
+        "callingDescriptor": "markup://c:PSI_Search",
+        "params": {
+            "searchBy": search_by,
+            "firstName": "",
+            "lastName": "",
+            "businessName": "",
+            "licenceNumber": f"{lic_no}",
+            "distanceInKm": 5,
+            "batchSize": batch_size,
+            "offset": offset,
+        },
+    }
+    return {
+        "message": json.dumps({"actions": [action]}, separators=(",", ":")),
+        "aura.context": POOL_SAFETY_AURA_CONTEXT,
+        "aura.pageURI": "/s/pool-safety-inspector-search",
+        "aura.token": "null",
+    }
+
+
+def parse_aura_payload(status_code, text):
+    """
+    Decode an Aura response, returns None when the endpoint rejected the
+    request (stale page scope/request id, invalid session, out of sync
+    client or a server side exception).
+    """
+    if status_code != 200:
+        return
+
+    try:
+        payload = json.loads(text)
+    except ValueError:
+        return
+
+    if payload.get("exceptionEvent") or not payload.get("actions"):
+        return
+
+    if payload["actions"][0].get("state") == "ERROR":
+        return
+
+    return payload
+
+
+def parse_pool_safety_response(payload):
+    """
+    Pick the first inspector from a searchInspectors response and flag it
+    as expired when its expiry date has passed.
+    """
+    results = payload["actions"][0]["returnValue"]
+    if not results or len(results) <= 0:
+        return
+
+    return flag_expired_inspector(results[0])
+
+
+def flag_expired_inspector(inspector):
+    """
+    set "expired" on an inspector record whose expiry date has passed
+    """
+    expiry_date = datetime.strptime(inspector["expiryDate"], "%Y-%m-%d")
+    if datetime.now() > expiry_date:
+        inspector["expired"] = True
+
+    return inspector
+
+
+class AuraClient:
+    """
+    Long lived client of the pool safety inspector search Aura endpoint.
+
+    The page scope id and request id are taken from the search page once and
+    reused for every searchInspectors call. They are only fetched again when
+    the endpoint rejects a call.
+    """
+
+    def __init__(self):
+        self.http = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """
+        load the search page and rebuild the X-Sfdc-* headers
+        """
+        logger.debug("Refreshing Aura context from %s", POOL_SAFETY_SEARCH_URL)
+        s = requests.Session()
+        with run_stats.phase("warm_up"):
+            response = http_request("GET", POOL_SAFETY_SEARCH_URL, http=s)
+
+        cookies = s.cookies.get_dict()
+        sfdc_headers = pool_safety_aura_headers(
+            cookies.get("renderCtx"), response.headers.get("x-sfdc-request-id")
+        )
+
+        s.headers.update(POOL_SAFETY_HEADERS)
+        s.headers.update(sfdc_headers)
+        self.http = s
+
+    def _session(self, stale=None):
+        with self._lock:
+            if self.http is None or self.http is stale:
+                self.refresh()
+            return self.http
+
+    def search_inspectors(self, lic_no="", **params):
+        """
+        Post a searchInspectors action and return the decoded response,
+        refreshing the Aura context once if it is rejected.
+        """
+        data = pool_safety_aura_payload(lic_no, **params)
+
+        http = self._session()
+        response = http_request("POST", POOL_SAFETY_AURA_URL, http=http, data=data)
+        payload = parse_aura_payload(response.status_code, response.text)
+        if payload is not None:
+            return payload
+
+        logger.info("Aura endpoint rejected the request, refreshing context.")
+        http = self._session(stale=http)
+        response = http_request("POST", POOL_SAFETY_AURA_URL, http=http, data=data)
+        payload = parse_aura_payload(response.status_code, response.text)
+        if payload is None:
+            raise TransientLookupError(
+                f"Aura endpoint rejected the request (HTTP {response.status_code})"
+            )
+        return payload
+
+    def fetch_register(self, search_by="name", batch_size=1000, max_batches=100):
+        """
+        Download the whole inspector register with paginated
+        searchInspectors calls. Returns the inspectors and whether the
+        download is complete, it is cut off after max_batches batches.
+        """
+        inspectors = []
+        complete = False
+        for batch in range(max_batches):
+            payload = self.search_inspectors(
+                search_by=search_by, batch_size=batch_size, offset=batch * batch_size
+            )
+            results = payload["actions"][0]["returnValue"] or []
+            inspectors.extend(results)
+            logger.info(
+                "Downloaded %d pool safety inspectors (batch %d)",
+                len(inspectors),
+                batch + 1,
+            )
+            if len(results) < batch_size:
+                complete = True
+                break
+
+        return inspectors, complete
+
+
+pool_safety_client = AuraClient()
+
+
+def normalize_license_no(license_no):
+    """
+    normalise a licence number for register lookups
+    """
+    return re.sub(r"\s+", "", f"{license_no}").upper()
 
 
-def process_sheet_engr(wb, sheetname, args, config, sheet_config, orig_filename):
+class PoolSafetyRegister:
     """
-    process_sheet_engr
+    In-memory index of the pool safety inspector register keyed by
+    normalised licence number. When the download was incomplete, licences
+    missing from the index are looked up live.
+    """
+
+    def __init__(self, inspectors, licence_field="licenceNumber", complete=True):
+        self.complete = complete
+        self.index = {}
+        for inspector in inspectors:
+            license_no = normalize_license_no(inspector.get(licence_field) or "")
+            if license_no:
+                self.index.setdefault(license_no, inspector)
+
+    def __len__(self):
+        return len(self.index)
+
+    def get(self, license_no):
+        """
+        inspector of a licence number in the index, None when absent
+        """
+        inspector = self.index.get(normalize_license_no(license_no))
+        if inspector:
+            return flag_expired_inspector(dict(inspector))
+
+    def lookup(self, license_no):
+        """
+        same result as query_pool_safety_license, without a network call
+        unless the register is incomplete
+        """
+        inspector = self.get(license_no)
+        if inspector or self.complete:
+            return inspector
+        return query_pool_safety_license(license_no)
+
+
+def load_pool_safety_register(config):
     """
-    if not all(keyword in sheetname.lower() for keyword in ["engineers"]):
+    Download the pool safety register when pool_safety_bulk is enabled in
+    config.yml. Returns None when bulk mode is off or the download failed or
+    came back empty, in which case rows are looked up one at a time.
+    """
+    bulk_config = config.get("pool_safety_bulk") or {}
+    if not bulk_config.get("enabled", False):
         return
 
-    logger.info("Processing Engineers Tab...")
+    logger.info("Downloading pool safety inspector register...")
+    try:
+        inspectors, complete = pool_safety_client.fetch_register(
+            search_by=bulk_config.get("search_by", "name"),
+            batch_size=bulk_config.get("batch_size", 1000),
+            max_batches=bulk_config.get("max_batches", 100),
+        )
+    except TransientLookupError as e:
+        logger.warning("Pool safety register download failed: %s", e)
+        return
+
+    if not complete:
+        logger.warning(
+            "Pool safety register download stopped after max_batches, "
+            "licences not in it are looked up live."
+        )
+    register = PoolSafetyRegister(
+        inspectors,
+        licence_field=bulk_config.get("licence_field", "licenceNumber"),
+        complete=complete,
+    )
+    if not register:
+        logger.warning("Pool safety register is empty, using live lookups.")
+        return
+
+    logger.info("Indexed %d pool safety licences.", len(register))
+    return register
+
+
+@cached_lookup("pool_safety")
+def query_pool_safety_license(lic_no):
+    """
+    query_pool_safety_license
+    """
+    return parse_pool_safety_response(pool_safety_client.search_inspectors(lic_no))
+
+
+# registries the lookup planner prefetches, architects and engineers only
+# when they are looked up without a browser
+PLANNED_REGISTRIES = {
+    "qbcc": query_qbcc_license,
+    "qbcc_certifier": query_qbcc_certifier_license,
+    "pool_safety": query_pool_safety_license,
+    "surveyor": query_surveyor_license,
+    "architects": query_arch_registration_http,
+    "engineers": query_engr_registration_http,
+}
+
+
+def process_sheet_qbcc_pool_safety(
+    wb, sheetname, args, config, sheet_config, orig_filename
+):
+    """
+    process_sheet_qbcc_pool_safety
+    """
+    logger.info("Processing QBCC Pool Safety Tab <QBCC>...")
     sheet = wb[sheetname]
+    register = load_pool_safety_register(config)
+    querier = register.lookup if register else query_pool_safety_license
+
+    for count, (row, data) in enumerate(
+        iter_sheet_rows(
+            sheet, sheet_config, headers=["licence number"], config=config
+        ), start=1
+    ):
+        logger.info("Processing Line #%d", count)
 
-    config = read_config()
-    count = 0
+        try_save(wb, config, orig_filename)
 
-    driver = init_web_driver()
+        license_no = data.get("licence number", "").strip()
+        # Skip rows with a recent "last checked" date
 
-    for row, data in enum_rows(sheet):
-        if count > 0 and (count % config["numrec_before_save"]) == 0:
-            logger.info(
-                "===============================================\n \
-                Saving progress to excel file...\n=================================="
+        if not license_no:
+            message = (
+                "License No. Column not found!"
+                if "licence number" not in data
+                else "License No is BLANK !"
             )
-            wb.save(orig_filename)
+            logger.info(message)
+            update_license_status(row, message, sheet_config)
+            continue
 
         if should_skip_row(row, sheet_config, config):
             continue
 
-        license_number = str(row[sheet_config["license_index"]].value or "")
-        logger.info("Fetching Registration info of %s:", license_number)
-        reg_status = query_engr_registration(license_number, driver)
+        logger.info("Fetching License info of %s:", license_no)
+        try:
+            lic_status = querier(license_no)
+        except TransientLookupError as e:
+            skip_transient_row(row, e)
+            continue
+
+        if lic_status:
+            expired = lic_status.get("expired", False)
 
-        if reg_status:
-            logger.info("Registration info found!")
+            if expired:
+                update_license_status(row, "License Expired", sheet_config)
+            else:
+                update_license_status(row, "Active", sheet_config)
+        else:
+            logger.info("License not found in online register!")
+            update_license_status(row, "Missing in Register", sheet_config)
 
-            # name, company, date_registered_from, job_type, status, date_registered = reg_status
-            # return name, company, date_registered_from, job_type, status, date_registered_to
-            # lic_class, _, _, lic_status = lic_statuses[0]
+    try_save(wb, config, orig_filename)
 
-            status = reg_status["status"]
 
-            logger.info("\tName: %s", reg_status["name"])
-            logger.info("\tCompany: %s", reg_status["company"])
-            logger.info(
-                "\tDate Registered From: %s", reg_status["date_registered_from"]
-            )
-            logger.info("\tType: %s", reg_status["job_type"])
-            logger.info("\tStatus: %s", reg_status["status"])
-            logger.info("\tDate Registered To: %s", reg_status["date_registered_to"])
+def process_sheet_qbcc_individual(
+    wb,
+    sheetname,
+    args,
+    config,
+    sheet_config,
+    orig_filename,
+    license_querier=query_qbcc_license,
+):
+    """
+    process_sheet_qbcc_individual, also used for the company and certifier
+    tabs with their license_querier
+    """
+    logger.info("Processing QBCC tab %s...", sheetname)
 
-            row[sheet_config["status_index"]].value = status.strip().title()
-            row[sheet_config["last_checked_index"]].value = datetime.now().date()
-        else:
-            logger.info("Registration info not found in online register !")
-            row[sheet_config["status_index"]].value = "Missing in Register"
-            row[sheet_config["last_checked_index"]].value = datetime.now().date()
+    sheet = wb[sheetname]
+    pending = []
 
-        count = count + 1
+    rows = iter_sheet_rows(sheet, sheet_config, config=config)
+    for idx, (row, data) in enumerate(rows):
+        logger.info("Processing Line #%s", (idx + 1))
 
+        if should_skip_row(row, sheet_config, config):
+            continue
 
-def update_license_status(row, status, sheet_config):
-    """Helper function to update status and last checked date for a row."""
-    row[sheet_config["status_index"]].value = status
-    row[sheet_config["last_checked_index"]].value = datetime.now().date()
+        license_no = (
+            row[sheet_config["license_index"]].value
+            if row[sheet_config["license_index"]].value
+            else ""
+        )
+        # rows without a licence number are kept in place, with no lookup
+        pending.append((row, license_no))
 
+    def lookup(item):
+        _, license_no = item
+        if license_no in [None, ""]:
+            return None
+        logger.info("Fetching License info of %s:", license_no)
+        try:
+            return list(license_querier(license_no))
+        except TransientLookupError as e:
+            return e
+
+    # Lookups run on the worker pool, cell writes and checkpoints stay on
+    # this thread and follow the original row order.
+    workers = sheet_config.get("lookup_workers", config.get("lookup_workers", 1))
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for (row, license_no), lic_statuses in zip(
+            pending, executor.map(lookup, pending)
+        ):
+            try_save(wb, config, orig_filename)
+
+            if license_no in [None, ""]:
+                update_license_status(row, "Invalid License Number!", sheet_config)
+            elif isinstance(lic_statuses, TransientLookupError):
+                skip_transient_row(row, lic_statuses)
+            elif len(lic_statuses) > 0:
+                logger.info("License info found for %s!", license_no)
+                lic_class, _, _, lic_status = lic_statuses[0]
+                logger.info("\tLicense Class: %s", lic_class)
+                logger.info("\tStatus: %s", lic_status)
+
+                update_license_status(row, lic_status.title().strip(), sheet_config)
 
-def handle_surveyor_license_query(row, search_text, sheet_config):
-    """Query surveyor's license and update the status in the row."""
-    result = query_surveyor_license(search_text)
-    if result:
-        update_license_status(row, "Active", sheet_config)
-        return True
-    else:
-        update_license_status(row, "License Not Found", sheet_config)
-        return False
+            else:
+                logger.info("License %s not found in online register !", license_no)
+                update_license_status(row, "Missing in Register", sheet_config)
 
 
-def process_sheet_surveyor(wb, sheetname, args, config, sheet_config, orig_filename):
+class ProgressJournal:
     """
-    process_sheet_surveyor
+    Append-only journal of the statuses written during a run.
+
+    Every status written to a row is appended to ``<workbook>.journal`` as a
+    JSON line as soon as it is known, so the workbook itself only has to be
+    rewritten every save_interval_seconds and at the end of the run. The
+    journal is truncated after every workbook save. When a run crashes, the
+    next run replays the journal into the workbook before it starts.
     """
-    if "surveyor" not in sheetname.lower():
-        return
 
-    logger.info("Processing Surveyor Tab: %s...", sheetname)
-    session.headers.clear()
-    session.headers.update(
-        {
-            "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
-            "accept-language": "en-US,en;q=0.7",
-            "cache-control": "no-cache",
-            "pragma": "no-cache",
-            "referer": "https://sbq.com.au/find-a-surveyor/search-cadastral/",
-            "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36",
+    def __init__(self):
+        self.path = None
+        self.pending = {}
+        self.last_saved = time.monotonic()
+        self._fp = None
+        self._lock = threading.Lock()
+
+    def open(self, filepath):
+        """
+        start journaling the statuses of a workbook
+        """
+        self.close()
+        self.path = f"{filepath}.journal"
+        self.pending = {}
+        self.last_saved = time.monotonic()
+        self._fp = open(self.path, "at", encoding="utf-8")
+
+    def record(self, row, status_index, status, last_checked_index, last_checked):
+        """
+        append the status and last checked date written to a row
+        """
+        if self._fp is None:
+            return
+
+        entry = {
+            "sheet": row.sheet.title,
+            "row": row.number,
+            "status_index": status_index,
+            "status": status,
+            "last_checked_index": last_checked_index,
+            "date": last_checked.isoformat(),
+        }
+        with self._lock:
+            self._fp.write(json.dumps(entry) + "\n")
+            self._fp.flush()
+
+    def entries(self):
+        """
+        read the entries of the journal file
+        """
+        if not self.path or not os.path.exists(self.path):
+            return
+
+        with open(self.path, "rt", encoding="utf-8") as fp:
+            for line in fp:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # last line of a crashed run may be incomplete
+                    continue
+
+    def load_pending(self, wb, filter_rows=None):
+        """
+        Keep the values journaled by a previous run in memory, so rows of a
+        read-only workbook show them before they are written back. Only the
+        rows in filter_rows(sheet, row numbers) are kept when given.
+        """
+        entries = {}
+        for entry in self.entries():
+            if entry["sheet"] in wb.sheetnames:
+                entries.setdefault(entry["sheet"], []).append(entry)
+
+        self.pending = {}
+        for title, sheet_entries in entries.items():
+            rows = {entry["row"] for entry in sheet_entries}
+            if filter_rows:
+                rows = filter_rows(wb[title], rows)
+            for entry in sheet_entries:
+                if entry["row"] not in rows:
+                    continue
+                key = (entry["sheet"], entry["row"])
+                self.pending[key + (entry["status_index"],)] = entry["status"]
+                self.pending[key + (entry["last_checked_index"],)] = (
+                    date.fromisoformat(entry["date"])
+                )
+
+    def replay(self, wb, accept=None):
+        """
+        Apply the journal entries of a previous run to the workbook, only
+        the ones accept(sheet, row number) agrees with when given.
+        """
+        count = 0
+        for entry in self.entries():
+            if entry["sheet"] not in wb.sheetnames:
+                continue
+
+            sheet = wb[entry["sheet"]]
+            if accept and not accept(sheet, entry["row"]):
+                continue
+
+            sheet.cell(
+                row=entry["row"], column=entry["status_index"] + 1
+            ).value = entry["status"]
+            sheet.cell(
+                row=entry["row"], column=entry["last_checked_index"] + 1
+            ).value = date.fromisoformat(entry["date"])
+            count = count + 1
+
+        return count
+
+    def truncate(self):
+        """
+        drop the entries that are now saved in the workbook
+        """
+        with self._lock:
+            if self._fp is not None:
+                self._fp.truncate(0)
+                self._fp.seek(0)
+            self.last_saved = time.monotonic()
+
+    def close(self):
+        """
+        stop journaling
+        """
+        with self._lock:
+            if self._fp is not None:
+                self._fp.close()
+                self._fp = None
+
+    def remove(self):
+        """
+        close and delete the journal after the workbook was saved for good
+        """
+        self.close()
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+progress_journal = ProgressJournal()
+
+
+class ResumeIndex:
+    """
+    Index of the rows a run has finished, kept in ``<workbook>.resume``.
+
+    Every finished row is appended as a JSON line with a hash of its key
+    columns (every *_index column of the sheet_config except the status and
+    last checked ones). A restarted run treats a row as done only while its
+    key columns still hash the same, so rows that were edited or moved in
+    between are checked again. The index is removed once the workbook has
+    been saved at the end of a run.
+    """
+
+    RESULT_COLUMNS = ("status_index", "last_checked_index")
+
+    def __init__(self):
+        self.path = None
+        self.finished = {}
+        self._fp = None
+        self._lock = threading.Lock()
+
+    def open(self, filepath):
+        """
+        load the rows finished by previous runs and record the new ones
+        """
+        self.close()
+        self.path = f"{filepath}.resume"
+        self.finished = {}
+        if os.path.exists(self.path):
+            with open(self.path, "rt", encoding="utf-8") as fp:
+                for line in fp:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # last line of a crashed run may be incomplete
+                        continue
+                    self.finished[(entry["sheet"], entry["row"])] = entry
+
+        self._fp = open(self.path, "at", encoding="utf-8")
+        return len(self.finished)
+
+    @classmethod
+    def key_columns(cls, sheet_config):
+        """
+        0-based columns identifying the licence of a row
+        """
+        return [
+            value
+            for key, value in sorted(sheet_config.items())
+            if key.endswith("_index")
+            and key not in cls.RESULT_COLUMNS
+            and isinstance(value, int)
+        ]
+
+    @staticmethod
+    def key_hash(values):
+        """
+        content hash of the key column values of a row
+        """
+        text = json.dumps([f"{value}".strip() for value in values])
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def is_finished(self, row, sheet_config):
+        """
+        whether a previous run finished this row with the same key columns
+        """
+        sheet = getattr(row, "sheet", None)
+        if not self.finished or sheet is None:
+            return False
+
+        entry = self.finished.get((sheet.title, row.number))
+        if entry is None:
+            return False
+
+        columns = self.key_columns(sheet_config)
+        return entry["columns"] == columns and entry["hash"] == self.key_hash(
+            row[col].value for col in columns
+        )
+
+    def matches(self, sheet, row_number):
+        """
+        Whether the row of an entry still has the key columns it was
+        finished with. Rows without an entry are accepted.
+        """
+        entry = self.finished.get((sheet.title, row_number))
+        if entry is None:
+            return True
+
+        return entry["hash"] == self.key_hash(
+            sheet.cell(row=row_number, column=col + 1).value
+            for col in entry["columns"]
+        )
+
+    def matching_rows(self, sheet, row_numbers):
+        """
+        The row numbers matches() accepts, reading the key columns in one
+        pass over the sheet, as cells of a read-only sheet are slow to read
+        one at a time.
+        """
+        entries = {}
+        for number in row_numbers:
+            entry = self.finished.get((sheet.title, number))
+            if entry is not None:
+                entries[number] = entry
+
+        accepted = set(row_numbers) - set(entries)
+        if not entries:
+            return accepted
+
+        first = min(entries)
+        for number, values in enumerate(
+            sheet.iter_rows(min_row=first, max_row=max(entries), values_only=True),
+            start=first,
+        ):
+            entry = entries.get(number)
+            if entry and entry["hash"] == self.key_hash(
+                values[col] if col < len(values) else None
+                for col in entry["columns"]
+            ):
+                accepted.add(number)
+
+        return accepted
+
+    def record(self, row, sheet_config):
+        """
+        mark a row as finished
+        """
+        if self._fp is None:
+            return
+
+        columns = self.key_columns(sheet_config)
+        entry = {
+            "sheet": row.sheet.title,
+            "row": row.number,
+            "columns": columns,
+            "hash": self.key_hash(row[col].value for col in columns),
         }
+        with self._lock:
+            self._fp.write(json.dumps(entry) + "\n")
+            self._fp.flush()
+            self.finished[(entry["sheet"], entry["row"])] = entry
+
+    def close(self):
+        """
+        stop recording
+        """
+        with self._lock:
+            if self._fp is not None:
+                self._fp.close()
+                self._fp = None
+
+    def remove(self):
+        """
+        close and delete the index after the run completed
+        """
+        self.close()
+        self.finished = {}
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+resume_index = ResumeIndex()
+
+
+def try_save(wb, config, orig_filename):
+    """
+    Save the excel file when save_interval_seconds have passed since the
+    last save. Statuses written in between are kept in the progress journal.
+    """
+    interval = config.get("save_interval_seconds", 300)
+    if interval is None:
+        # sheets running in parallel, the workbook is only saved at the end
+        return
+
+    if time.monotonic() - progress_journal.last_saved < interval:
+        return
+
+    if wb.read_only:
+        # nothing to save before the write-back pass, the journal holds
+        # every status written so far
+        return
+
+    logger.info(
+        "===============================================\n \
+            Saving progress to excel file...\n=================================="
     )
+    with run_stats.timed("save", RunStats.WORKBOOK):
+        wb.save(orig_filename)
+    progress_journal.truncate()
+
+
+def read_config():
+    """
+    Read YAML configuration
+    """
+    with open("./config.yml", "rt", errors="ignore", encoding="utf-8") as fp:
+        conf = yaml.load(fp, Loader=Loader)
+
+    return conf
+
+def reduce_text(text:str):
+    output = re.sub(r"^[\s\d]+\.","",text.lower())
+    return output.strip()
+
+
+SHEET_KINDS = [
+    ("qbcc_individual", ["qbcc", "individual"]),
+    ("qbcc_company", ["qbcc", "company"]),
+    ("qbcc_certifier", ["qbcc", "certifier"]),
+    ("pool_safety", ["qbcc", "pool", "safety"]),
+    ("surveyor", ["surveyor"]),
+    ("architects", ["architects"]),
+    ("engineers", ["engineers"]),
+]
+
+# registry each kind of sheet is checked against, the individual and
+# company QBCC tabs share the contractor licence register
+SHEET_REGISTRIES = {
+    "qbcc_individual": "qbcc",
+    "qbcc_company": "qbcc",
+    "qbcc_certifier": "qbcc_certifier",
+    "pool_safety": "pool_safety",
+    "surveyor": "surveyor",
+    "architects": "architects",
+    "engineers": "engineers",
+}
+
+
+# the one processor that handles each kind of sheet
+SHEET_PROCESSORS = {
+    "qbcc_individual": process_sheet_qbcc_individual,
+    "qbcc_company": process_sheet_qbcc_individual,
+    "qbcc_certifier": partial(
+        process_sheet_qbcc_individual, license_querier=query_qbcc_certifier_license
+    ),
+    "pool_safety": process_sheet_qbcc_pool_safety,
+    "surveyor": process_sheet_surveyor,
+    "architects": process_sheet_arch,
+    "engineers": process_sheet_engr,
+}
+
+
+def sheet_kind(sheetname):
+    """
+    Return the kind of register check a sheet needs, based on the same
+    keywords the sheet processors look for.
+    """
+    name = sheetname.lower()
+    for kind, keywords in SHEET_KINDS:
+        if all(keyword in name for keyword in keywords):
+            return kind
+
+
+def configured_sheets(wb, config):
+    """
+    Yield (sheetname, sheet_config) for every sheet of the workbook that
+    has an entry in sheets_config, and whose name contains one of
+    only_sheets when that is set.
+    """
+    only_sheets = [reduce_text(name) for name in config.get("only_sheets") or []]
+    for sheetname in wb.sheetnames:
+        if only_sheets and not any(
+            name in reduce_text(sheetname) for name in only_sheets
+        ):
+            continue
+        for sheetname_filter in config["sheets_config"].keys():
+            if reduce_text(sheetname_filter) == reduce_text(sheetname):
+                sheet_config = config["sheets_config"].get(sheetname_filter)
+                if not sheet_config:
+                    logger.error(
+                        "Sheet/Tab with name: %s was not found in config.yml. Please re-check!",
+                        sheetname,
+                    )
+                    break
+
+                yield sheetname, sheet_config
+
+
+def row_lookup_keys(kind, row, data, sheet_config):
+    """
+    Return the registry search keys of a row in the order they should be
+    tried. An empty list means the row has no licence number to look up.
+    """
+    if kind == "pool_safety":
+        license_no = data.get("licence number", "").strip()
+        return [license_no] if license_no else []
+
+    if kind == "surveyor":
+        first_name = f"{row[sheet_config['first_name_index']].value or ''}".strip()
+        surname = f"{row[sheet_config['surname_index']].value or ''}".strip()
+        company = f"{row[sheet_config['company_index']].value or ''}".strip()
+        if first_name == "" or surname == "":
+            return [company]
+
+        # First try with name, fallback to company if name fails
+        return [re.sub(r"\s+", " ", f"{first_name} {surname}".strip()), company]
+
+    license_no = row[sheet_config["license_index"]].value
+    if kind in ("architects", "engineers"):
+        return [str(license_no or "")]
+
+    return [license_no] if license_no not in [None, ""] else []
+
+
+# fallback searches of a row run here while the first key is looked up
+fallback_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="fallback")
+
+
+def first_match(lookup, keys):
+    """
+    Look up all the search keys of a row at the same time and return the
+    result of the first key, in order, that matched. A TransientLookupError
+    is only raised when none of them matched.
+    """
+    if not keys:
+        return None
+
+    fallbacks = [fallback_executor.submit(lookup, key) for key in keys[1:]]
+    results = [partial(lookup, keys[0])] + [future.result for future in fallbacks]
+    error = None
+    for result in results:
+        try:
+            value = result()
+        except TransientLookupError as e:
+            error = error or e
+            continue
+        if value:
+            return value
 
-    sheet = wb[sheetname]
-    count = 0
+    if error:
+        raise error
+    return value
 
-    for idx, (row, data) in enumerate(enum_rows(sheet)):
-        if count > 0 and (count % config["numrec_before_save"]) == 0:
-            logger.info(
-                "===============================================\n \
-                Saving progress to excel file...\n=================================="
-            )
-            wb.save(orig_filename)
 
-        # Skip rows with a recent "last checked" date
-        if should_skip_row(row, sheet_config, config):
+async def first_match_async(lookup, keys):
+    """
+    first_match for a coroutine lookup function
+    """
+    if not keys:
+        return None
+
+    tasks = [asyncio.ensure_future(lookup(key)) for key in keys]
+    for task in tasks:
+        # fallbacks left running when an earlier key matched
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    error = None
+    for task in tasks:
+        try:
+            value = await task
+        except TransientLookupError as e:
+            error = error or e
             continue
+        if value:
+            return value
 
-        first_name = f"{row[sheet_config['first_name_index']].value or ''}".strip()
-        surname = f"{row[sheet_config['surname_index']].value or ''}".strip()
-        search_text = re.sub(r"\s+", " ", f"{first_name} {surname}".strip())
+    if error:
+        raise error
+    return value
 
-        if first_name == "" or surname == "":
-            company = f"{row[sheet_config['company_index']].value or ''}".strip()
-            handle_surveyor_license_query(row, company, sheet_config)
-        else:
-            # First try with name, fallback to company if name fails
-            if not handle_surveyor_license_query(row, search_text, sheet_config):
-                company = f"{row[sheet_config['company_index']].value or ''}".strip()
-                handle_surveyor_license_query(row, company, sheet_config)
 
-        count += 1
+def sheet_lookup_jobs(kind, sheet, config, sheet_config):
+    """
+    Yield (row, data, keys) for every row of a sheet that is due for a
+    check. keys is empty for rows without a licence number.
+    """
+    headers = ["licence number"] if kind == "pool_safety" else None
+    for row, data in iter_sheet_rows(
+        sheet, sheet_config, headers=headers, config=config
+    ):
+        # the pool safety tab flags blank licence numbers even on fresh rows
+        if kind != "pool_safety" and should_skip_row(row, sheet_config, config):
+            continue
 
+        keys = row_lookup_keys(kind, row, data, sheet_config)
+        if keys and kind == "pool_safety" and should_skip_row(
+            row, sheet_config, config
+        ):
+            continue
 
-def should_skip_row(row, sheet_config, cfg):
-    """Check if the row should be skipped based on last checked date."""
-    last_date_checked = row[sheet_config["last_checked_index"]].value
-    if last_date_checked and isinstance(last_date_checked, datetime):
-        delta = datetime.now().date() - last_date_checked.date()
-        return delta.days <= cfg.get("skip_days", 5)
-    else:
-        return False
+        yield row, data, keys
 
 
-def query_pool_safety_license(lic_no):
+def blank_key_status(kind, data):
     """
-    query_pool_safety_license
+    status written to rows without a licence number
     """
-    default_headers = {
-        "accept": "*/*",
-        "accept-language": "en-US,en;q=0.9",
-        "cache-control": "no-cache",
-        "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
-        "origin": "https://my.qbcc.qld.gov.au",
-        "pragma": "no-cache",
-        "priority": "u=1, i",
-        "referer": "https://my.qbcc.qld.gov.au/s/pool-safety-inspector-search",
-        "sec-ch-ua": '"Brave";v="129", "Not=A?Brand";v="8", "Chromium";v="129"',
-        "sec-ch-ua-mobile": "?0",
-        "sec-ch-ua-platform": '"Windows"',
-        "sec-fetch-dest": "empty",
-        "sec-fetch-mode": "cors",
-        "sec-fetch-site": "same-origin",
-        "sec-gpc": "1",
-        "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Safari/537.36",
-        # 'x-sfdc-page-scope-id': '3bdc58c4-042b-42d8-8bcd-b875c8aa3bfb',
-        # 'x-sfdc-request-id': '415150000004b0f99f',
-    }
+    if kind == "pool_safety":
+        return (
+            "License No. Column not found!"
+            if "licence number" not in data
+            else "License No is BLANK !"
+        )
 
-    s = requests.Session()
-    response = s.get("https://my.qbcc.qld.gov.au/s/pool-safety-inspector-search")
+    return "Invalid License Number!"
 
-    cookies = s.cookies.get_dict()
-    context = cookies.get("renderCtx")
-    context_decoded = json.loads(urllib.parse.unquote(context))
-    sfdc_req_id = response.headers.get("x-sfdc-request-id")
-    x_sfdc_page_scope_id = context_decoded.get("pageId")
 
-    s.headers.update(default_headers)
-    s.headers.update(
-        {
-            # "x-request-id":req_id,
-            "X-Sfdc-Request-Id": sfdc_req_id,
-            "X-Sfdc-Page-Scope-Id": x_sfdc_page_scope_id,
-        }
-    )
-    url = "https://my.qbcc.qld.gov.au/s/sfsites/aura?other.PSISearch.searchInspectors=1"
+def lookup_result_status(kind, result):
+    """
+    Translate the parsed result of a registry lookup into the status
+    written to the sheet.
+    """
+    if kind == "pool_safety":
+        if not result:
+            return "Missing in Register"
+        return "License Expired" if result.get("expired", False) else "Active"
 
-    data = {
-        "message": '{"actions":[{"id":"175;a","descriptor":"apex://PSISearchController/ACTION$searchInspectors","callingDescriptor":"markup://c:PSI_Search","params":{"searchBy":"licence","firstName":"","lastName":"","businessName":"","licenceNumber":"%s","distanceInKm":5,"batchSize":1000,"offset":0}}]}'
-        % (lic_no,),
-        "aura.context": '{"mode":"PROD","fwuid":"eGx3MHlRT1lEMUpQaWVxbGRUM1h0Z2hZX25NdHFVdGpDN3BnWlROY1ZGT3cyNTAuOC40LTYuNC41","app":"siteforce:communityApp","loaded":{"APPLICATION@markup://siteforce:communityApp":"wi0I2YUoyrm6Lo80fhxdzA","COMPONENT@markup://instrumentation:o11ySecondaryLoader":"1JitVv-ZC5qlK6HkuofJqQ"},"dn":[],"globals":{},"uad":false}',
-        "aura.pageURI": "/s/pool-safety-inspector-search",
-        "aura.token": "null",
-    }
+    if kind == "surveyor":
+        return "Active" if result else "License Not Found"
 
-    response = s.post(url, data=data)
+    if result and len(result) > 0:
+        _, _, _, lic_status = result[0]
+        return lic_status.title().strip()
 
-    results = response.json()["actions"][0]["returnValue"]
-    if not results or len(results) <= 0:
-        return
+    return "Missing in Register"
 
-    results0 = results[0]
-    expiry_date = datetime.strptime(results0["expiryDate"], "%Y-%m-%d")
-    if datetime.now() > expiry_date:
-        results0["expired"] = True
 
-    return results0
+AsyncResponse = namedtuple("AsyncResponse", "status text headers cookies")
 
 
-def process_sheet_qbcc_pool_safety(
-    wb, sheetname, args, config, sheet_config, orig_filename
-):
+class AsyncRegistryEngine:
     """
-    process_sheet_qbcc_pool_safety
+    asyncio counterpart of the requests based registry queries.
+
+    All lookups share one pooled aiohttp client. Every registry gets its own
+    concurrency semaphore and shares the adaptive rate limiter. Requests have
+    the connect and read timeouts of request_policy and are retried with
+    jittered exponential backoff on connection errors, 429 and 5xx
+    responses, raising TransientLookupError when the retries are used up.
+    Search pages are warmed up once per run instead of once per lookup.
     """
-    if not all(keyword in sheetname.lower() for keyword in ["qbcc", "pool", "safety"]):
-        return
-
-    logger.info("Processing QBCC Pool Safety Tab <QBCC>...")
-    sheet = wb[sheetname]
-    save_interval = config["numrec_before_save"]
 
-    for count, (row, data) in enumerate(enum_rows(sheet), start=1):
-        logger.info("Processing Line #%d", count)
+    def __init__(self, config):
+        engine_config = config.get("async_engine") or {}
+        self.timeout = engine_config.get("timeout", 30)
+        self.retries = engine_config.get("retries", 3)
+        self.backoff = engine_config.get("backoff", 1.0)
+        self.concurrency = engine_config.get("concurrency") or {}
+        self.default_concurrency = engine_config.get("default_concurrency", 4)
+        self._semaphores = {}
+        self._in_flight = {}
+        self._warm_locks = {}
+        self._warmed = set()
+        self._aura_lock = None
+        self._aura_headers = None
+        self._client = None
+
+    async def __aenter__(self):
+        import aiohttp
+
+        headers = dict(session.headers)
+        # aiohttp can only decode gzip/deflate without extra packages
+        headers["Accept-Encoding"] = "gzip, deflate"
+        self._client = aiohttp.ClientSession(
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(
+                total=self.timeout,
+                sock_connect=request_policy.connect_timeout,
+                sock_read=request_policy.read_timeout,
+            ),
+            connector=aiohttp.TCPConnector(
+                limit=sum(self.concurrency.values()) or 100
+            ),
+        )
+        self._aura_lock = asyncio.Lock()
+        return self
 
-        if count % save_interval == 0:
-            logger.info("Saving progress to excel file...")
-            wb.save(orig_filename)
+    async def __aexit__(self, *exc_info):
+        await self._client.close()
 
-        license_no = data.get("licence number", "").strip()
-        # Skip rows with a recent "last checked" date
+    def lookup_function(self, kind):
+        """
+        coroutine function that looks up a key for a kind of sheet
+        """
+        return {
+            "qbcc_individual": self.qbcc_license,
+            "qbcc_company": self.qbcc_license,
+            "qbcc_certifier": self.qbcc_certifier_license,
+            "pool_safety": self.pool_safety_license,
+            "surveyor": self.surveyor_license,
+        }.get(kind)
+
+    async def lookup_once(self, registry, key, lookup):
+        """
+        Run a lookup through the run planner and the persistent cache.
+        Concurrent lookups of the same key share a single request.
+        """
+        result = lookup_planner.get(registry, key)
+        if result is not CACHE_MISS:
+            run_stats.count("reused", registry)
+            return result
+
+        result = lookup_cache.get(registry, key)
+        if result is not CACHE_MISS:
+            run_stats.count("cache_hit", registry)
+            lookup_planner.put(registry, key, result)
+            return result
+
+        in_flight = (registry, LookupCache.normalize_key(key))
+        if in_flight not in self._in_flight:
+            logger.info("Fetching License info of %s:", key)
+            with run_stats.registry(registry):
+                self._in_flight[in_flight] = asyncio.ensure_future(
+                    self._timed_lookup(lookup, key)
+                )
 
-        if not license_no:
-            message = (
-                "License No. Column not found!"
-                if "licence number" not in data
-                else "License No is BLANK !"
+        try:
+            result = await asyncio.shield(self._in_flight[in_flight])
+        finally:
+            self._in_flight.pop(in_flight, None)
+
+        if result:
+            lookup_cache.put(registry, key, result)
+        lookup_planner.put(registry, key, result)
+        return result
+
+    @staticmethod
+    async def _timed_lookup(lookup, key):
+        run_stats.count("cache_miss")
+        with run_stats.timed("lookup"):
+            return await lookup(key)
+
+    def _semaphore(self, registry):
+        if registry not in self._semaphores:
+            self._semaphores[registry] = asyncio.Semaphore(
+                self.concurrency.get(registry, self.default_concurrency)
             )
-            logger.info(message)
-            row[sheet_config["status_index"]].value = message
-            row[sheet_config["last_checked_index"]].value = datetime.now().date()
-            continue
+        return self._semaphores[registry]
+
+    async def _request(self, registry, method, url, **kwargs):
+        import aiohttp
+
+        host = urllib.parse.urlsplit(url).hostname
+        async with self._semaphore(registry):
+            for attempt in range(self.retries + 1):
+                delay = rate_limiter.reserve(host)
+                if delay > 0:
+                    run_stats.record("throttle", delay)
+                    await asyncio.sleep(delay)
+
+                started = time.monotonic()
+                retry_after = None
+                try:
+                    async with self._client.request(method, url, **kwargs) as response:
+                        text = await response.text(errors="ignore")
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    run_stats.record(current_phase.get(), time.monotonic() - started)
+                    rate_limiter.feedback(host)
+                    error = e
+                else:
+                    elapsed = time.monotonic() - started
+                    run_stats.record(current_phase.get(), elapsed)
+                    retry_after = retry_after_seconds(response.headers)
+                    rate_limiter.feedback(
+                        host,
+                        response.status,
+                        elapsed,
+                        retry_after if response.status == 429 else None,
+                    )
+                    if response.status not in request_policy.RETRY_STATUS_CODES:
+                        return AsyncResponse(
+                            response.status, text, response.headers, response.cookies
+                        )
+                    error = f"HTTP {response.status}"
 
-        if should_skip_row(row, sheet_config, config):
-            continue
+                if attempt < self.retries:
+                    run_stats.count("retries")
+                    wait = request_policy.delay(attempt, retry_after, self.backoff)
+                    logger.debug(
+                        "%s %s failed (%s), retrying in %.1fs", method, url, error, wait
+                    )
+                    await asyncio.sleep(wait)
 
-        logger.info("Fetching License info of %s:", license_no)
-        lic_status = query_pool_safety_license(license_no)
-        if lic_status:
-            expired = lic_status.get("expired", False)
+        raise TransientLookupError(f"{method} {url} failed: {error}")
 
-            if expired:
-                row[sheet_config["status_index"]].value = "License Expired"
-            else:
-                row[sheet_config["status_index"]].value = "Active"
-        else:
-            logger.info("License not found in online register!")
-            row[sheet_config["status_index"]].value = "Missing in Register"
+    async def _warm_up(self, registry, url, **kwargs):
+        lock = self._warm_locks.setdefault(url, asyncio.Lock())
+        async with lock:
+            if url not in self._warmed:
+                with run_stats.phase("warm_up"):
+                    response = await self._request(registry, "GET", url, **kwargs)
+                self._warmed.add(url)
+                return response
 
-        row[sheet_config["last_checked_index"]].value = datetime.now().date()
+    async def qbcc_license(self, license_no):
+        """
+        async query_qbcc_license
+        """
+        await self._warm_up("qbcc", QBCC_CONTRACTOR_SEARCH_URL)
+        response = await self._request(
+            "qbcc",
+            "GET",
+            QBCC_DETAIL_URL,
+            params=qbcc_detail_params(license_no, "Contractor"),
+        )
+        if response.status != 200:
+            raise TransientLookupError(
+                f"QBCC detail page returned HTTP {response.status}"
+            )
 
-    wb.save(orig_filename)
+        return list(parse_qbcc_response(response.text))
 
+    async def qbcc_certifier_license(self, license_no):
+        """
+        async query_qbcc_certifier_license
+        """
+        await self._warm_up("qbcc_certifier", QBCC_CERTIFIER_SEARCH_URL)
+        response = await self._request(
+            "qbcc_certifier",
+            "GET",
+            QBCC_DETAIL_URL,
+            params=qbcc_detail_params(license_no, "Certifier"),
+        )
+        if response.status != 200:
+            raise TransientLookupError(
+                f"QBCC detail page returned HTTP {response.status}"
+            )
 
-def process_sheet_qbcc_individual(
-    wb,
-    sheetname,
-    args,
-    config,
-    sheet_config,
-    orig_filename,
-    license_querier=query_qbcc_license,
-    keywords=None,
-):
-    """
-    process_sheet_qbcc_individual
-    """
-    used_keywords = []
-    if keywords is None:
-        used_keywords = ["qbcc", "individual"]
-    else:
-        used_keywords.extend(keywords)
+        return list(parse_qbcc_response(response.text))
 
-    if not all(keyword in sheetname.lower() for keyword in used_keywords):
-        return
+    async def surveyor_license(self, search_text):
+        """
+        async query_surveyor_license
+        """
+        search_text = re.sub(r"\s+", " ", f"{search_text}".strip())
+        logger.info("Looking up surveyor info: %s", search_text)
+        await self._warm_up("surveyor", SURVEYOR_SEARCH_URL, headers=SURVEYOR_HEADERS)
+        response = await self._request(
+            "surveyor",
+            "GET",
+            SURVEYOR_SEARCH_URL,
+            params=surveyor_search_params(search_text),
+            headers=SURVEYOR_HEADERS,
+        )
+        if response.status != 200:
+            raise TransientLookupError(
+                f"surveyor search returned HTTP {response.status}"
+            )
 
-    logger.info("Processing QBCC Individual...")
+        return parse_surveyor_response(response.text)
 
-    sheet = wb[sheetname]
-    count = 0
+    async def _refresh_aura_headers(self, stale=None):
+        async with self._aura_lock:
+            if self._aura_headers is None or self._aura_headers is stale:
+                with run_stats.phase("warm_up"):
+                    response = await self._request(
+                        "pool_safety", "GET", POOL_SAFETY_SEARCH_URL
+                    )
+                render_ctx = response.cookies.get("renderCtx")
+                self._aura_headers = dict(POOL_SAFETY_HEADERS)
+                self._aura_headers.update(
+                    pool_safety_aura_headers(
+                        render_ctx.value if render_ctx else None,
+                        response.headers.get("x-sfdc-request-id"),
+                    )
+                )
+            return self._aura_headers
 
-    for idx, (row, data) in enumerate(enum_rows(sheet)):
-        logger.info("Processing Line #%s", (idx + 1))
+    async def pool_safety_license(self, lic_no):
+        """
+        async query_pool_safety_license
+        """
+        headers = await self._refresh_aura_headers()
+        data = pool_safety_aura_payload(lic_no)
+        response = await self._request(
+            "pool_safety", "POST", POOL_SAFETY_AURA_URL, data=data, headers=headers
+        )
+        payload = parse_aura_payload(response.status, response.text)
+        if payload is None:
+            headers = await self._refresh_aura_headers(stale=headers)
+            response = await self._request(
+                "pool_safety", "POST", POOL_SAFETY_AURA_URL, data=data, headers=headers
+            )
+            payload = parse_aura_payload(response.status, response.text)
+            if payload is None:
+                raise TransientLookupError(
+                    f"Aura endpoint rejected the request (HTTP {response.status})"
+                )
 
-        if should_skip_row(row, sheet_config, config):
-            continue
+        return parse_pool_safety_response(payload)
 
-        try_save(wb, config, orig_filename, count)
 
-        license_no = (
-            row[sheet_config["license_index"]].value
-            if row[sheet_config["license_index"]].value
-            else ""
-        )
-        if license_no in [None, ""]:
-            row[sheet_config["status_index"]].value = "Invalid License Number!"
-            row[sheet_config["last_checked_index"]].value = datetime.now().date()
-            count = count + 1
+async def process_sheet_async(engine, wb, sheetname, config, sheet_config):
+    """
+    Look up every due row of a sheet concurrently with the async engine.
+    Cell writes happen on the event loop thread.
+    """
+    kind = sheet_kind(sheetname)
+    registry = SHEET_REGISTRIES[kind]
+    lookup = engine.lookup_function(kind)
+    if kind == "pool_safety":
+        register = await asyncio.to_thread(load_pool_safety_register, config)
+        if register:
+            live_lookup = lookup
+
+            async def lookup(key):
+                inspector = register.get(key)
+                if inspector or register.complete:
+                    return inspector
+                return await live_lookup(key)
+
+    # surveyor rows found in the register snapshot are not looked up live
+    local_lookup = None
+    if kind == "surveyor":
+        register = await asyncio.to_thread(load_surveyor_register, config)
+        if register:
+            local_lookup = register.lookup_keys
+
+    logger.info("Processing SHEET: %s (async)", sheetname)
+
+    sheet = wb[sheetname]
+    jobs = []
+    for row, data, keys in sheet_lookup_jobs(kind, sheet, config, sheet_config):
+        if not keys:
+            update_license_status(row, blank_key_status(kind, data), sheet_config)
             continue
 
-        logger.info("Fetching License info of %s:", license_no)
-        lic_statuses = list(license_querier(license_no))
-        if len(lic_statuses) > 0:
-            logger.info("License info found!")
-            lic_class, _, _, lic_status = lic_statuses[0]
-            logger.info("\tLicense Class: %s", lic_class)
-            logger.info("\tStatus: %s", lic_status)
+        jobs.append((row, keys))
+
+    async def run(row, keys):
+        result = local_lookup(keys) if local_lookup else None
+        try:
+            result = result or await first_match_async(
+                partial(engine.lookup_once, registry, lookup=lookup), keys
+            )
+        except TransientLookupError as e:
+            skip_transient_row(row, e)
+            return
 
-            row[sheet_config["status_index"]].value = lic_status.title().strip()
+        update_license_status(row, lookup_result_status(kind, result), sheet_config)
+
+    await asyncio.gather(*(run(row, keys) for row, keys in jobs))
 
-        else:
-            logger.info("License not found in online register !")
-            row[sheet_config["status_index"]].value = "Missing in Register"
 
-        row[sheet_config["last_checked_index"]].value = datetime.now().date()
-        count = count + 1
+ASYNC_SHEET_KINDS = [
+    "qbcc_individual",
+    "qbcc_company",
+    "qbcc_certifier",
+    "pool_safety",
+    "surveyor",
+]
 
 
-def try_save(wb, config, orig_filename, count):
+async def process_sheets_async(wb, sheets, config, orig_filename):
     """
-    try saving excel file
+    Run the lookups of several sheets at the same time. The workbook is not
+    saved while they run, a save would stall every lookup in flight on the
+    event loop. The journal keeps the statuses until the checkpoint after
+    the sheets.
     """
-    if count > 0 and (count % config["numrec_before_save"]) == 0:
-        logger.info(
-            "===============================================\n \
-                Saving progress to excel file...\n=================================="
+    async with AsyncRegistryEngine(config) as engine:
+        await asyncio.gather(
+            *(
+                process_sheet_async(engine, wb, sheetname, config, sheet_config)
+                for sheetname, sheet_config in sheets
+            )
         )
-        wb.save(orig_filename)
+    try_save(wb, config, orig_filename)
 
 
-def read_config():
+def run_sheet_jobs(jobs, workers):
     """
-    Read YAML configuration
+    Run the per-sheet jobs, at most workers at the same time. Cell writes
+    of the jobs are applied on this thread. Every job runs to the end
+    before the first error is raised.
     """
-    with open("./config.yml", "rt", errors="ignore", encoding="utf-8") as fp:
-        conf = yaml.load(fp, Loader=Loader)
+    if workers <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            job()
+        return
 
-    return conf
+    with cell_writer.deferred():
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(job) for job in jobs]
+            while not all(future.done() for future in futures):
+                cell_writer.apply(timeout=0.2)
+    for future in futures:
+        future.result()
 
-def reduce_text(text:str):
-    output = re.sub(r"^[\s\d]+\.","",text.lower())
-    return output.strip()
 
-def process_workbook(filepath, args):
+def write_back(filepath):
     """
-    process workbook
+    Second pass of a two_pass run: open the workbook once, write the
+    journaled statuses and last checked dates and save it.
+    """
+    wb = openpyxl.load_workbook(filepath)
+    try:
+        count = progress_journal.replay(wb, accept=resume_index.matches)
+        logger.info("Process done. Writing %d statuses to %s.", count, filepath)
+        with run_stats.timed("save", RunStats.WORKBOOK):
+            wb.save(filepath)
+    finally:
+        wb.close()
+
+
+def process_workbook(filepath, args, overrides=None):
+    """
+    process workbook, overrides replace config.yml settings for this run
     """
     wb = None
+    run_stats.reset(filepath)
 
     try:
-        wb = openpyxl.load_workbook(filepath)
+        config = dict(read_config(), **(overrides or {}))
+        # first pass only streams the sheets, the statuses are written back
+        # in a second pass from the progress journal
+        two_pass = config.get("two_pass", False)
+        wb = openpyxl.load_workbook(filepath, read_only=two_pass)
 
         logger.info("Found %d sheets.", len(wb.sheetnames))
         logger.info("\n".join([f"\t{s}" for s in wb.sheetnames]))
 
-        config = read_config()
-        process_qbcc_certifier = partial(
-            process_sheet_qbcc_individual,
-            license_querier=query_qbcc_certifier_license,
-            keywords=["qbcc", "certifier"],
-        )
-        process_qbcc_company = partial(
-            process_sheet_qbcc_individual, keywords=["qbcc", "company"]
+        rate_limiter.configure(config)
+        request_policy.configure(config)
+        lookup_cache.configure(config)
+        configure_html_parser(config)
+        progress_journal.open(filepath)
+        resumed = resume_index.open(filepath)
+        if resumed:
+            logger.info("Resuming, %d rows were finished by a previous run.", resumed)
+        if two_pass:
+            progress_journal.load_pending(wb, filter_rows=resume_index.matching_rows)
+        else:
+            replayed = progress_journal.replay(wb, accept=resume_index.matches)
+            if replayed:
+                logger.info(
+                    "Replayed %d journaled statuses of a previous run.", replayed
+                )
+        lookup_planner.reset()
+        browser_pool.configure(config)
+        if config.get("plan_lookups", False) and config.get("engine") != "async":
+            lookup_planner.execute(wb, config)
+
+        # sheets can run at the same time as they only share the read-only
+        # lookup state, the workbook is then saved once when they all ended
+        workers = config.get("sheet_workers", 1)
+        sheet_run_config = (
+            dict(config, save_interval_seconds=None) if workers > 1 else config
         )
 
-        processors = [
-            process_sheet_qbcc_individual,
-            process_qbcc_company,
-            process_qbcc_certifier,
-            process_sheet_qbcc_pool_safety,
-            process_sheet_surveyor,
-            process_sheet_arch,
-            process_sheet_engr,
-        ]
+        jobs = []
+        async_sheets = []
+        for sheetname, sheet_config in configured_sheets(wb, config):
+            kind = sheet_kind(sheetname)
+            if config.get("engine") == "async" and kind in ASYNC_SHEET_KINDS:
+                async_sheets.append((sheetname, sheet_config))
+                continue
+
+            processor = SHEET_PROCESSORS.get(kind)
+            if processor is None:
+                logger.info("No processor for SHEET: %s, skipping.", sheetname)
+                continue
+
+            jobs.append(
+                partial(
+                    processor,
+                    wb,
+                    sheetname,
+                    args,
+                    sheet_run_config,
+                    sheet_config,
+                    filepath,
+                )
+            )
 
-        if config.get("with_browser", False):
-            processors += [
-                process_sheet_arch,
-                process_sheet_engr,
-            ]
-
-        for sheetname in wb.sheetnames:
-            for sheetname_filter in config["sheets_config"].keys():
-                if reduce_text(sheetname_filter) == reduce_text(sheetname):
-                    logger.info("Processing SHEET: %s", sheetname)
-                    sheet_config = config["sheets_config"].get(sheetname_filter)
-                    if not sheet_config:
-                        logger.error(
-                            "Sheet/Tab with name: %s was not found in config.yml. Please re-check!",
-                            sheetname,
-                        )
-                        break
+        if async_sheets:
+            jobs.append(
+                lambda: asyncio.run(
+                    process_sheets_async(wb, async_sheets, sheet_run_config, filepath)
+                )
+            )
 
-                    for processor in processors:
-                        processor(wb, sheetname, args, config, sheet_config, filepath)
+        run_sheet_jobs(jobs, workers)
 
-        logger.info("Process done. Saving workbook to %s.", filepath)
-        wb.save(filepath)
+        if two_pass:
+            wb.close()
+            wb = None
+            write_back(filepath)
+        else:
+            logger.info("Process done. Saving workbook to %s.", filepath)
+            with run_stats.timed("save", RunStats.WORKBOOK):
+                wb.save(filepath)
+        progress_journal.remove()
+        resume_index.remove()
     except Exception as e:
         raise e
     finally:
+        progress_journal.close()
+        resume_index.close()
+        browser_pool.shutdown()
         if wb:
             wb.close()
+        try:
+            run_stats.write(f"{filepath}.stats.json")
+        except Exception as e:
+            logger.info("Could not write the run summary: %s", e)
+
+
+def move_file(src, dest):
+    """
+    move a hotfolder file, ignoring failures
+    """
+    try:
+        shutil.move(src, dest)
+    except Exception:
+        pass
+
+
+def ignore_interrupts():
+    """
+    rate limiter Manager initializer, Ctrl+C is handled by the main process
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def init_job_worker(buckets, lock):
+    """
+    job process initializer, the rate limiter buckets are shared by all jobs
+    """
+    rate_limiter.share(buckets, lock)
+
+
+class JobScheduler:
+    """
+    Runs the idle hotfolder files through a pool of job_workers processes.
+
+    A file is moved to the processing folder when it is submitted and to
+    the done or error folder when its job ends, or back to the hotfolder when
+    it is cancelled before it started. The rate limiter buckets live in a
+    multiprocessing Manager, so rate_limits apply to all the running jobs
+    together instead of to each one.
+    """
+
+    def __init__(self, config, args):
+        self.config = config
+        self.args = args
+        self.workers = max(1, config.get("job_workers", 1))
+        # stopped by shutdown() once the last job ended
+        self._manager = SyncManager()
+        self._manager.start(ignore_interrupts)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=init_job_worker,
+            initargs=(self._manager.dict(), self._manager.Lock()),
+        )
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, file_path):
+        """
+        move a file to the processing folder and queue its job
+        """
+        processing_path = os.path.join(
+            self.config["processing"], os.path.basename(file_path)
+        )
+        move_file(file_path, processing_path)
+
+        future = self._executor.submit(process_workbook, processing_path, self.args)
+        with self._lock:
+            self._jobs[processing_path] = future
+            logger.info(
+                "Queued %s, %d jobs running or waiting.",
+                processing_path,
+                len(self._jobs),
+            )
+        future.add_done_callback(partial(self._finished, processing_path))
+        return future
+
+    def _finished(self, processing_path, future):
+        if future.cancelled():
+            logger.info(
+                "Cancelled %s, moving it back to the hotfolder.", processing_path
+            )
+            dest = self.config["hotfolder"]
+        elif future.exception() is not None:
+            logger.error(
+                "Processing %s failed.", processing_path, exc_info=future.exception()
+            )
+            dest = self.config["error"]
+        else:
+            dest = self.config["done"]
+
+        basename = os.path.basename(processing_path)
+        move_file(processing_path, os.path.join(dest, basename))
+        # the run summary goes along with the workbook
+        move_file(
+            f"{processing_path}.stats.json",
+            os.path.join(dest, f"{basename}.stats.json"),
+        )
+        with self._lock:
+            self._jobs.pop(processing_path, None)
+
+    def pending(self):
+        """
+        number of jobs running or waiting
+        """
+        with self._lock:
+            return len(self._jobs)
+
+    def shutdown(self, cancel_waiting=False):
+        """
+        Stop the job processes after the running jobs ended, and then the
+        rate limiter Manager they share. Waiting jobs are cancelled when
+        cancel_waiting is set.
+        """
+        if self.pending():
+            logger.info("Waiting for the running jobs to end...")
+        self._executor.shutdown(wait=True, cancel_futures=cancel_waiting)
+        self._manager.shutdown()
 
 
-class IdleFileHandler(FileSystemEventHandler):
+class IdleFileHandler:
     """
-    hotfolder watcher class
+    Hotfolder watcher class.
+
+    Every created or modified event (re)starts an idle_time timer for the
+    file. When a timer fires without further events the file is put on the
+    ready queue, and its entry is dropped. Implements the dispatch method
+    watchdog observers call, so watchdog is only imported by main.
     """
 
     def __init__(self, idle_time):
         self.idle_time = idle_time
-        self.last_modified_time = {}
+        self.ready = queue.Queue()
+        self._timers = {}
+        self._lock = threading.Lock()
+
+    def _watched(self, event, path=None):
+        return not event.is_directory and "~" not in (path or event.src_path)
+
+    def _reset_timer(self, file_path):
+        timer = threading.Timer(self.idle_time, self._idle, args=(file_path,))
+        timer.daemon = True
+        with self._lock:
+            previous = self._timers.get(file_path)
+            if previous:
+                previous.cancel()
+            self._timers[file_path] = timer
+        timer.start()
+
+    def _cancel_timer(self, file_path):
+        with self._lock:
+            timer = self._timers.pop(file_path, None)
+        if timer:
+            timer.cancel()
+
+    def _idle(self, file_path):
+        with self._lock:
+            if self._timers.get(file_path) is not threading.current_thread():
+                # reset by a later event
+                return
+            del self._timers[file_path]
+        self.ready.put(file_path)
+
+    def dispatch(self, event):
+        """
+        call the on_<event type> method of a watchdog event
+        """
+        handler = getattr(self, f"on_{event.event_type}", None)
+        if handler:
+            handler(event)
 
     def on_created(self, event):
-        if not event.is_directory:
-            file_path = event.src_path
-            if "~" not in file_path:
-                self.last_modified_time[file_path] = time.time()
-                logger.info(
-                    "New file added: %s, waiting for it to become idle.", file_path
-                )
+        if self._watched(event):
+            logger.info(
+                "New file added: %s, waiting for it to become idle.", event.src_path
+            )
+            self._reset_timer(event.src_path)
 
     def on_modified(self, event):
+        if self._watched(event):
+            self._reset_timer(event.src_path)
+
+    def on_moved(self, event):
         if not event.is_directory:
-            pass
+            self._cancel_timer(event.src_path)
+        if self._watched(event, event.dest_path):
+            self._reset_timer(event.dest_path)
 
-    def __move_file(self, src, dest):
-        try:
-            shutil.move(src, dest)
-        except Exception:
-            pass
+    def on_deleted(self, event):
+        if not event.is_directory:
+            self._cancel_timer(event.src_path)
 
-    def process_if_idle(self, file_path, args, config):
+    def next_idle(self, timeout=None):
         """
-        main processor function
+        wait for the next idle file, None when timeout passed first
         """
-        # Wait until the file is idle
-        while True:
-            if (
-                file_path in self.last_modified_time
-                and self.last_modified_time[file_path]
-            ):
-                time_since_modification = (
-                    time.time() - self.last_modified_time[file_path]
-                )
-                if time_since_modification > self.idle_time:
-                    print(f"{file_path} is idle, processing...")
-                    self.last_modified_time[file_path] = None
-                    processing_path = os.path.join(
-                        config["processing"], os.path.basename(file_path)
-                    )
-                    self.__move_file(file_path, processing_path)
+        try:
+            file_path = self.ready.get(timeout=timeout)
+        except queue.Empty:
+            return None
 
-                    # Process the file here
-                    try:
-                        process_workbook(processing_path, args)
-                        done_path = os.path.join(
-                            config["done"], os.path.basename(file_path)
-                        )
-                        self.__move_file(processing_path, done_path)
-                    except Exception as e:
-                        logger.exception(e)
-                        error_path = os.path.join(
-                            config["error"], os.path.basename(file_path)
-                        )
-                        self.__move_file(processing_path, error_path)
+        if not os.path.exists(file_path):
+            return None
 
-                    break
-            time.sleep(1)
+        print(f"{file_path} is idle, processing...")
+        return file_path
+
+    def waiting(self):
+        """
+        number of files waiting to become idle
+        """
+        with self._lock:
+            return len(self._timers)
+
+    def stop(self):
+        """
+        cancel the idle timers
+        """
+        with self._lock:
+            timers = list(self._timers.values())
+            self._timers.clear()
+        for timer in timers:
+            timer.cancel()
 
 
 def prep_dirs(config):
@@ -919,17 +4026,118 @@ def prep_dirs(config):
             os.makedirs(d, exist_ok=True)
 
 
+def run_batch(args):
+    """
+    Process the workbooks given to the run command one after the other,
+    without the hotfolder, and print their throughput. Returns the exit
+    status.
+    """
+    overrides = {}
+    if args.sheet:
+        overrides["only_sheets"] = args.sheet
+    if args.workers:
+        overrides.update(sheet_workers=args.workers, lookup_workers=args.workers)
+    if args.max_rows:
+        overrides["max_rows"] = args.max_rows
+
+    failed = 0
+    summaries = []
+    for filepath in args.paths:
+        if not os.path.isfile(filepath):
+            logger.error("Workbook %s not found.", filepath)
+            failed = failed + 1
+            continue
+
+        try:
+            process_workbook(filepath, args, overrides)
+        except Exception:
+            logger.exception("Processing %s failed.", filepath)
+            failed = failed + 1
+            continue
+
+        try:
+            with open(f"{filepath}.stats.json", "rt", encoding="utf-8") as fp:
+                summaries.append(json.load(fp))
+        except (OSError, ValueError) as e:
+            logger.info("Could not read the run summary of %s: %s", filepath, e)
+
+    rows = sum(summary["rows"] for summary in summaries)
+    elapsed = sum(summary["elapsed_seconds"] for summary in summaries)
+    saving = sum(summary["save"]["seconds"] for summary in summaries)
+    print(f"{'workbook':<40} {'rows':>8} {'seconds':>9} {'rows/s':>8} {'save s':>8}")
+    for summary in summaries:
+        print(
+            f"{summary['workbook'][:40]:<40} {summary['rows']:>8} "
+            f"{summary['elapsed_seconds']:>9.1f} "
+            f"{summary['rows_per_second'] or 0:>8.2f} "
+            f"{summary['save']['seconds']:>8.2f}"
+        )
+    print(
+        f"{'total':<40} {rows:>8} {elapsed:>9.1f} "
+        f"{rows / elapsed if elapsed else 0:>8.2f} {saving:>8.2f}"
+    )
+    if failed:
+        print(f"{failed} of {len(args.paths)} workbooks failed, see debug.log")
+
+    return 1 if failed else 0
+
+
 def main():
     """
-    main entry point
+    main entry point, watches the hotfolder unless a command is given
     """
     parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--invalidate-cache",
+        nargs="?",
+        const="all",
+        metavar="REGISTRY[:KEY]",
+        help="drop cached lookups (all, a registry or one key) and exit",
+    )
+    commands = parser.add_subparsers(dest="command")
+    run_parser = commands.add_parser(
+        "run", help="check workbooks once and exit, without the hotfolder watcher"
+    )
+    run_parser.add_argument("paths", nargs="+", metavar="WORKBOOK")
+    run_parser.add_argument(
+        "--sheet",
+        action="append",
+        metavar="NAME",
+        help="only check the sheets whose name contains NAME, can be repeated",
+    )
+    run_parser.add_argument(
+        "--workers",
+        type=int,
+        help="sheets and lookups run at the same time, overrides sheet_workers "
+        "and lookup_workers",
+    )
+    run_parser.add_argument(
+        "--max-rows",
+        type=int,
+        help="only check the first MAX_ROWS rows of every sheet",
+    )
     args = parser.parse_args()
 
     config = read_config()
 
+    if args.invalidate_cache:
+        lookup_cache.configure(config)
+        registry, _, key = args.invalidate_cache.partition(":")
+        removed = lookup_cache.invalidate(
+            None if registry == "all" else registry, key or None
+        )
+        logger.info("Removed %d cached lookups.", removed)
+        lookup_cache.close()
+        return
+
+    if args.command == "run":
+        return run_batch(args)
+
     prep_dirs(config)
 
+    from watchdog.observers import Observer
+
+    scheduler = JobScheduler(config, args)
     event_handler = IdleFileHandler(config.get("idle_time", 5))
     observer = Observer()
     observer.schedule(event_handler, config["hotfolder"], recursive=False)
@@ -941,16 +4149,18 @@ def main():
             os.path.abspath(config["hotfolder"]),
         )
         while True:
-            # If a file has been modified, check if it is idle and process it
-            for file in event_handler.last_modified_time:
-                event_handler.process_if_idle(file, args, config)
-
-            time.sleep(1)
+            # the timeout only keeps Ctrl+C working on Windows
+            file_path = event_handler.next_idle(timeout=5)
+            if file_path:
+                scheduler.submit(file_path)
     except KeyboardInterrupt:
         observer.stop()
+        event_handler.stop()
+        scheduler.shutdown(cancel_waiting=True)
 
     observer.join()
 
 
 if __name__ == "__main__":
-    main()
+    multiprocessing.freeze_support()
+    sys.exit(main())
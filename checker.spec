@@ -10,11 +10,12 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=['win32api', 'win32file', 'win32con', 'win32security', 'win32event'],
+    hiddenimports=hiddenimports,
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    # optional extras of pandas and the standard library the checker never uses
+    excludes=['tkinter', 'matplotlib', 'IPython'],
     noarchive=False,
     optimize=0,
 )
@@ -27,7 +28,7 @@ exe = EXE(
     a.datas,
     [],
     name='checker',
-    debug=False,x
+    debug=False,
     bootloader_ignore_signals=False,
     strip=False,
     upx=True,
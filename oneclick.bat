@@ -1,2 +1,2 @@
 git pull origin master
-venv\Scripts\python.exe checker.py "data\Competent person register and naming.xlsx" --qbcc --engr --arch
\ No newline at end of file
+venv\Scripts\python.exe checker.py run "data\Competent person register and naming.xlsx" --sheet qbcc --sheet engineers --sheet architects
\ No newline at end of file